@@ -0,0 +1,37 @@
+"""
+App Multipágina - Aplicação Principal e Exemplos
+
+Reúne a aplicação principal e os cinco exemplos em um único app Streamlit,
+com navegação na sidebar (`st.navigation`). Em vez de seis processos, cada
+um com a sua cópia do dataset, todas as páginas rodam no mesmo processo e
+leem os dados do mesmo armazém (`natal_dados.armazem`), criado uma única
+vez com `st.cache_resource`.
+
+Cada página continua sendo um script independente: ela define a própria
+configuração (`st.set_page_config`) e a própria sidebar, e pode ser
+executada isoladamente com `streamlit run`.
+
+Para executar:
+
+    streamlit run app.py
+"""
+
+import streamlit as st
+
+# Nenhum comando do Streamlit deve ser executado antes da página escolhida:
+# cada página chama `st.set_page_config` como primeiro comando. O armazém de
+# dados é criado pela primeira página que o pedir e reaproveitado pelas demais.
+paginas = {
+    "Análise": [
+        st.Page("streamlit_app.py", title="Análise Socioeconômica", icon="📊", default=True),
+    ],
+    "Exemplos": [
+        st.Page("examples/exemplo1_elementos_basicos.py", title="Elementos Básicos", icon="📝"),
+        st.Page("examples/exemplo2_widgets_interativos.py", title="Widgets Interativos", icon="🎛️"),
+        st.Page("examples/exemplo3_plotly_visualizacao.py", title="Visualização com Plotly", icon="📈"),
+        st.Page("examples/exemplo4_layout_containers.py", title="Layout e Containers", icon="📑"),
+        st.Page("examples/exemplo5_filtros_dados_reais.py", title="Filtros e Dados Reais", icon="🔍"),
+    ],
+}
+
+st.navigation(paginas).run()
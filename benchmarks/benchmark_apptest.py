@@ -0,0 +1,307 @@
+"""
+Benchmark de latência das execuções dos scripts, sem navegador
+
+Usa `streamlit.testing.v1.AppTest` para executar `streamlit_app.py`, o app
+multipágina e cada exemplo sobre um dataset local, e percorre um roteiro de
+interações por script (seleção de região e indicador, sliders, busca por
+texto, troca de página). Para cada interação, registra o tempo da nova
+execução do script e a quantidade de elementos renderizados.
+
+Roda sem rede: por padrão, o dataset é um snapshot Arrow sintético
+(`natal_dados.sintetico`) gerado em um diretório temporário e indicado ao
+carregamento por `NATAL_DADOS_FONTE`. Com `--fonte`, usa um CSV ou snapshot
+local. O pré-carregamento em segundo plano fica desligado, para que os
+tempos não dependam das threads; `--prefetch` o liga.
+
+O processo termina com código 1 se alguma execução passar do orçamento de
+latência (`--orcamento-ms`; a primeira execução de cada script, que inclui
+a carga dos dados, usa `--orcamento-abertura-ms`) ou levantar exceção.
+
+Os resultados são acrescentados a um arquivo JSON, como em
+`benchmark_pipeline.py`.
+
+Exemplo:
+
+    python benchmarks/benchmark_apptest.py --linhas 5000 --repeticoes 3
+"""
+
+import argparse
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.append(str(RAIZ))
+
+import pandas as pd
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+from benchmark_pipeline import commit_atual, gravar_resultados
+from natal_dados import compactar_tipos, construir_snapshot
+from natal_dados.sintetico import gerar_bairros
+
+SAIDA_PADRAO = Path(__file__).resolve().parent / 'resultados' / 'apptest.json'
+
+
+def _fracao(inicio, fim):
+    """Valor de slider de intervalo entre as frações `inicio` e `fim` da faixa do widget."""
+    def valor(widget):
+        amplitude = widget.max - widget.min
+        baixo, alto = widget.min + amplitude * inicio, widget.min + amplitude * fim
+        if isinstance(widget.min, int):
+            return int(baixo), int(alto)
+        return baixo, alto
+    return valor
+
+
+def _meio(widget):
+    return (widget.min + widget.max) / 2
+
+
+def _primeira_opcao(widget):
+    if not widget.options:
+        raise LookupError(f'widget sem opções: {widget.label!r}')
+    return widget.options[0]
+
+
+def _tabela_proximidade(app):
+    """Erro se a tabela de bairros próximos (com a coluna de distância) não foi renderizada."""
+    if not any('distancia_km' in tabela.value.columns for tabela in app.dataframe):
+        return 'tabela de bairros próximos não renderizada'
+    return None
+
+
+# Roteiro de interações por script: (descrição, tipo do widget, início do
+# rótulo, valor[, verificação]). O valor pode ser uma função que recebe o
+# widget. A verificação opcional recebe o app depois da execução e retorna
+# uma mensagem de erro ou None. O tipo 'pagina' troca de página no app
+# multipágina.
+ROTEIROS = {
+    'streamlit_app.py': [
+        ('região sul', 'selectbox', 'Selecione a Região:', 'sul'),
+        ('indicador população', 'selectbox', 'Selecione o Indicador:', 'População Total'),
+        ('região todas', 'selectbox', 'Selecione a Região:', 'Todas'),
+        ('indicador renda', 'selectbox', 'Selecione o Indicador:', 'Renda Mensal por Pessoa (R$)'),
+        ('limiar de rendimento', 'slider', 'Limiar de Rendimento:', _meio),
+        ('ranking 10', 'number_input', 'Bairros no ranking', 10),
+        ('área do mapa', 'slider', 'Coordenada X:', _fracao(0.25, 0.75)),
+        ('bairro de referência', 'text_input', 'Bairro de referência:', 'setor_01'),
+        ('candidato', 'selectbox', 'Bairros encontrados:', _primeira_opcao),
+        ('raio 5 km', 'slider', 'Raio (km):', 5.0, _tabela_proximidade),
+        ('célula 0,5 km', 'select_slider', 'Célula do mapa de calor', 0.5),
+        ('células hexagonais', 'radio', 'Forma da célula:', 'Hexagonal'),
+    ],
+    'examples/exemplo1_elementos_basicos.py': [],
+    'examples/exemplo2_widgets_interativos.py': [
+        ('busca por prefixo', 'text_input', 'Digite o nome de um bairro', 'setor_00'),
+        ('busca aproximada', 'text_input', 'Digite o nome de um bairro', 'setr 01'),
+        ('região norte', 'selectbox', 'Escolha uma região', 'norte'),
+        ('colunas', 'multiselect', 'Selecione as colunas', ['bairro', 'renda_mensal_pessoa']),
+        ('métrica população', 'radio', 'Escolha uma métrica', 'População'),
+        ('top bairros', 'slider', 'Número de bairros', 20),
+        ('faixa de população', 'slider', 'Faixa de população', _fracao(0.25, 0.5)),
+        ('mapa de regiões', 'checkbox', 'Mostrar mapa de regiões', True),
+    ],
+    'examples/exemplo3_plotly_visualizacao.py': [
+        ('variável população', 'selectbox', 'Selecione a variável', 'populacao'),
+        ('sem valores', 'checkbox', 'Mostrar valores no gráfico', False),
+        ('ranking 10', 'slider', 'Bairros no ranking', 10),
+    ],
+    'examples/exemplo4_layout_containers.py': [
+        ('região norte', 'selectbox', 'Filtrar por região:', 'norte'),
+        ('faixa de população', 'slider', 'Filtrar por população:', _fracao(0.25, 0.75)),
+        ('região todas', 'selectbox', 'Filtrar por região:', 'Todas'),
+    ],
+    'examples/exemplo5_filtros_dados_reais.py': [
+        ('região leste', 'selectbox', 'Selecione a Região:', 'leste'),
+        ('indicador população', 'selectbox', 'Selecione o Indicador:', 'População Total'),
+        ('limiar', 'slider', 'Limiar de', _fracao(0.1, 1.0)),
+        ('segundo indicador', 'selectbox', 'Selecione outro indicador',
+         'Rendimento Nominal Médio (sal. mín.)'),
+    ],
+    'app.py': [
+        ('página exemplo 5', 'pagina', None, 'examples/exemplo5_filtros_dados_reais.py'),
+        ('página exemplo 2', 'pagina', None, 'examples/exemplo2_widgets_interativos.py'),
+        ('página principal', 'pagina', None, 'streamlit_app.py'),
+    ],
+}
+
+
+def localizar(app, tipo, rotulo):
+    """Primeiro widget do tipo cujo rótulo começa com `rotulo`."""
+    for widget in app.get(tipo):
+        if widget.label.startswith(rotulo):
+            return widget
+    raise LookupError(f'widget {tipo} não encontrado: {rotulo!r}')
+
+
+def interagir(app, tipo, rotulo, valor):
+    """Aplica uma interação do roteiro; a execução acontece depois, em `app.run()`."""
+    if tipo == 'pagina':
+        app.switch_page(valor)
+        return
+    widget = localizar(app, tipo, rotulo)
+    if callable(valor):
+        valor = valor(widget)
+    widget.set_value(valor)
+
+
+def contar_elementos(no):
+    """Quantidade de elementos (folhas) na árvore renderizada."""
+    filhos = getattr(no, 'children', None)
+    if filhos is None:
+        return 1
+    return sum(contar_elementos(filho) for filho in filhos.values())
+
+
+def executar(app):
+    inicio = time.perf_counter()
+    app.run()
+    segundos = time.perf_counter() - inicio
+    erros = [excecao.value for excecao in app.exception]
+    elementos = contar_elementos(app.main) + contar_elementos(app.sidebar)
+    return segundos, elementos, erros
+
+
+def medir_script(script, roteiro, timeout):
+    """Executa o roteiro de um script uma vez; retorna uma medição por execução."""
+    app = AppTest.from_file(str(RAIZ / script), default_timeout=timeout)
+    medicoes = []
+
+    segundos, elementos, erros = executar(app)
+    medicoes.append({'interacao': 'abrir', 'segundos': segundos,
+                     'elementos': elementos, 'erros': erros})
+
+    for descricao, tipo, rotulo, valor, *verificacao in roteiro:
+        try:
+            interagir(app, tipo, rotulo, valor)
+        except LookupError as erro:
+            medicoes.append({'interacao': descricao, 'segundos': None,
+                             'elementos': None, 'erros': [str(erro)]})
+            continue
+        segundos, elementos, erros = executar(app)
+        if verificacao and not erros:
+            falha = verificacao[0](app)
+            if falha:
+                erros.append(falha)
+        medicoes.append({'interacao': descricao, 'segundos': segundos,
+                         'elementos': elementos, 'erros': erros})
+    return medicoes
+
+
+def resumir(repeticoes_medidas, orcamento_s, orcamento_abertura_s):
+    """Junta as repetições de um script: mediana e máximo por interação, e violações."""
+    interacoes = []
+    violacoes = []
+    for posicao, primeira in enumerate(repeticoes_medidas[0]):
+        amostras = [medicoes[posicao] for medicoes in repeticoes_medidas]
+        tempos = [amostra['segundos'] for amostra in amostras if amostra['segundos'] is not None]
+        erros = sorted({erro for amostra in amostras for erro in amostra['erros']})
+        limite = orcamento_abertura_s if primeira['interacao'] == 'abrir' else orcamento_s
+
+        resumo = {
+            'interacao': primeira['interacao'],
+            'mediana_s': statistics.median(tempos) if tempos else None,
+            'maximo_s': max(tempos) if tempos else None,
+            'elementos': primeira['elementos'],
+            'orcamento_s': limite,
+            'erros': erros,
+        }
+        interacoes.append(resumo)
+        if erros:
+            violacoes.append(f"{resumo['interacao']}: {erros[0]}")
+        elif resumo['maximo_s'] > limite:
+            violacoes.append(
+                f"{resumo['interacao']}: {resumo['maximo_s'] * 1e3:.0f}ms > {limite * 1e3:.0f}ms"
+            )
+    return interacoes, violacoes
+
+
+def preparar_fonte(args, diretorio):
+    """Caminho do dataset usado pelos scripts (o informado ou um snapshot sintético)."""
+    if args.fonte:
+        return args.fonte
+    caminho = Path(diretorio) / f'sintetico_{args.linhas}.arrow'
+    construir_snapshot(compactar_tipos(gerar_bairros(args.linhas)), caminho)
+    return str(caminho)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scripts', nargs='+', default=list(ROTEIROS),
+                        help='scripts a medir (caminhos relativos à raiz do repositório)')
+    parser.add_argument('--linhas', type=int, default=2000,
+                        help='tamanho do dataset sintético')
+    parser.add_argument('--fonte', help='CSV ou snapshot local usado no lugar do sintético')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--orcamento-ms', type=float, default=1500.0)
+    parser.add_argument('--orcamento-abertura-ms', type=float, default=5000.0)
+    parser.add_argument('--timeout', type=float, default=60.0,
+                        help='tempo máximo de uma execução antes de o AppTest desistir (s)')
+    parser.add_argument('--prefetch', action='store_true',
+                        help='mantém o pré-carregamento em segundo plano ligado')
+    parser.add_argument('--saida', default=SAIDA_PADRAO)
+    args = parser.parse_args(argv)
+
+    desconhecidos = [script for script in args.scripts if script not in ROTEIROS]
+    if desconhecidos:
+        parser.error(f'sem roteiro para: {", ".join(desconhecidos)}')
+
+    os.environ['NATAL_PREFETCH'] = '1' if args.prefetch else '0'
+
+    resultados = []
+    violacoes = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        os.environ['NATAL_DADOS_FONTE'] = preparar_fonte(args, diretorio)
+
+        for script in args.scripts:
+            medidas = [medir_script(script, ROTEIROS[script], args.timeout)
+                       for _ in range(args.repeticoes)]
+            interacoes, violacoes_script = resumir(
+                medidas, args.orcamento_ms / 1e3, args.orcamento_abertura_ms / 1e3
+            )
+            resultados.append({'script': script, 'interacoes': interacoes})
+            violacoes += [f'{script} / {violacao}' for violacao in violacoes_script]
+
+            print(script)
+            for interacao in interacoes:
+                mediana = interacao['mediana_s']
+                tempo = f"{mediana * 1e3:8.1f}ms" if mediana is not None else '       -  '
+                marca = ' ERRO' if interacao['erros'] else ''
+                print(f"  {interacao['interacao']:<24}{tempo}  {interacao['elementos'] or 0:4d} elementos{marca}")
+
+    gravar_resultados({
+        'commit': commit_atual(),
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'streamlit': streamlit.__version__,
+        'parametros': {
+            'linhas': None if args.fonte else args.linhas,
+            'fonte': args.fonte,
+            'repeticoes': args.repeticoes,
+            'orcamento_ms': args.orcamento_ms,
+            'orcamento_abertura_ms': args.orcamento_abertura_ms,
+            'prefetch': args.prefetch,
+        },
+        'resultados': resultados,
+        'violacoes': violacoes,
+    }, args.saida)
+    print(f'Resultados gravados em {args.saida}')
+
+    if violacoes:
+        print('\nExecuções fora do orçamento ou com erro:')
+        for violacao in violacoes:
+            print(f'  {violacao}')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Benchmark do caminho pandas contra o caminho Arrow nativo
+
+Compara, sobre dados sintéticos em escala, as duas formas de levar o
+resultado dos filtros de região e de intervalo até a tela e à exportação:
+- pandas: `FiltroIncremental` (com os índices ordenados), cópia filtrada com
+  `iloc`, conversão para Arrow feita pelo `st.dataframe` e CSV com `to_csv`
+- arrow: `FiltroArrow` (kernels de `pyarrow.compute`) sobre a tabela Arrow,
+  serialização direta da tabela e CSV com `pyarrow.csv`
+
+Etapas medidas em cada caminho:
+- filtrar: máscaras dos dois filtros e materialização do resultado
+- serializar: bytes Arrow IPC que o `st.dataframe` enviaria com o resultado inteiro
+- pagina: ordenação pelo indicador e serialização de uma página de 50 linhas
+- exportar: conteúdo CSV do resultado
+
+Os resultados são acrescentados a `benchmarks/resultados/arrow.json`, um
+registro por execução, identificado pelo commit atual.
+
+Exemplo:
+
+    python benchmarks/benchmark_arrow.py --tamanhos 10000 100000 1000000
+"""
+
+import argparse
+import platform
+import statistics
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.append(str(RAIZ))
+
+import pandas as pd
+import pyarrow as pa
+from streamlit.dataframe_util import convert_arrow_table_to_arrow_bytes, convert_pandas_df_to_arrow_bytes
+
+from benchmark_pipeline import commit_atual, cronometrar, gravar_resultados
+from natal_dados import carregar_snapshot, compactar_tipos, construir_snapshot
+from natal_dados.colunar import FiltroArrow, construir_tabela_arrow, exportar_csv
+from natal_dados.filtros import FiltroIncremental
+from natal_dados.indices import construir_indices
+from natal_dados.sintetico import gerar_bairros
+from natal_dados.tabela import LINHAS_POR_PAGINA, fatiar_pagina, ordenar_posicoes
+
+SAIDA_PADRAO = Path(__file__).resolve().parent / 'resultados' / 'arrow.json'
+
+CAMINHOS = ('pandas', 'arrow')
+
+
+def executar_pandas(df, indices, regiao, coluna, minimo, maximo):
+    etapas = {}
+
+    def filtrar():
+        filtro = FiltroIncremental(df, indices)
+        filtro.igual('regiao', 'regiao', regiao)
+        filtro.intervalo('limiar', coluna, minimo, maximo)
+        return filtro.linhas()
+
+    etapas['filtrar'], df_filtrado = cronometrar(filtrar)
+    etapas['serializar'], payload = cronometrar(convert_pandas_df_to_arrow_bytes, df_filtrado)
+
+    def pagina():
+        ordem = ordenar_posicoes(df_filtrado, None, coluna, False)
+        return convert_pandas_df_to_arrow_bytes(fatiar_pagina(df_filtrado, ordem, 1, LINHAS_POR_PAGINA))
+
+    etapas['pagina'], _ = cronometrar(pagina)
+    etapas['exportar'], _ = cronometrar(lambda: df_filtrado.to_csv(index=False).encode())
+    return etapas, len(df_filtrado), len(payload)
+
+
+def executar_arrow(tabela, regiao, coluna, minimo, maximo):
+    etapas = {}
+
+    def filtrar():
+        filtro = FiltroArrow(tabela)
+        filtro.igual('regiao', 'regiao', regiao)
+        filtro.intervalo('limiar', coluna, minimo, maximo)
+        return filtro.linhas()
+
+    etapas['filtrar'], tabela_filtrada = cronometrar(filtrar)
+    etapas['serializar'], payload = cronometrar(convert_arrow_table_to_arrow_bytes, tabela_filtrada)
+
+    def pagina():
+        ordem = ordenar_posicoes(tabela_filtrada, None, coluna, False)
+        return convert_arrow_table_to_arrow_bytes(fatiar_pagina(tabela_filtrada, ordem, 1, LINHAS_POR_PAGINA))
+
+    etapas['pagina'], _ = cronometrar(pagina)
+    etapas['exportar'], _ = cronometrar(exportar_csv, tabela_filtrada)
+    return etapas, tabela_filtrada.num_rows, len(payload)
+
+
+def resumir(tempos):
+    return {
+        etapa: {
+            'mediana_s': statistics.median(valores),
+            'minimo_s': min(valores),
+            'maximo_s': max(valores),
+        }
+        for etapa, valores in tempos.items()
+    }
+
+
+def medir(n, repeticoes, regiao, coluna, diretorio):
+    """Executa os dois caminhos `repeticoes` vezes para um tamanho e resume os tempos."""
+    caminho = Path(diretorio) / f'sintetico_{n}.arrow'
+    construir_snapshot(compactar_tipos(gerar_bairros(n)), caminho)
+    df = compactar_tipos(carregar_snapshot(caminho))
+
+    # Estruturas construídas uma vez por carga nos dois caminhos; não entram na medida
+    indices = construir_indices(df)
+    tempo_tabela, tabela = cronometrar(construir_tabela_arrow, df)
+
+    # Limiar no meio da distribuição, como um slider parcialmente fechado
+    minimo, maximo = (float(v) for v in df[coluna].quantile([0.25, 0.75]))
+
+    tempos = {caminho: {} for caminho in CAMINHOS}
+    for _ in range(repeticoes):
+        resultados = {
+            'pandas': executar_pandas(df, indices, regiao, coluna, minimo, maximo),
+            'arrow': executar_arrow(tabela, regiao, coluna, minimo, maximo),
+        }
+        for caminho, (etapas, _, _) in resultados.items():
+            for etapa, segundos in etapas.items():
+                tempos[caminho].setdefault(etapa, []).append(segundos)
+
+    linhas = {caminho: resultado[1] for caminho, resultado in resultados.items()}
+    if linhas['pandas'] != linhas['arrow']:
+        raise RuntimeError(f'os caminhos divergem: {linhas}')
+
+    return {
+        'n': n,
+        'linhas_filtradas': linhas['arrow'],
+        'construir_tabela_arrow_s': tempo_tabela,
+        'bytes_serializados': {caminho: resultado[2] for caminho, resultado in resultados.items()},
+        'caminhos': {caminho: resumir(tempos[caminho]) for caminho in CAMINHOS},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--regiao', default='sul')
+    parser.add_argument('--indicador', default='renda_mensal_pessoa')
+    parser.add_argument('--saida', default=SAIDA_PADRAO)
+    args = parser.parse_args(argv)
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for n in args.tamanhos:
+            resultado = medir(n, args.repeticoes, args.regiao, args.indicador, diretorio)
+            resultados.append(resultado)
+            print(f"n={n} ({resultado['linhas_filtradas']} linhas filtradas)")
+            caminhos = resultado['caminhos']
+            for etapa in caminhos['pandas']:
+                pandas_ms = caminhos['pandas'][etapa]['mediana_s'] * 1e3
+                arrow_ms = caminhos['arrow'][etapa]['mediana_s'] * 1e3
+                print(f'  {etapa:<12} pandas={pandas_ms:8.1f}ms  arrow={arrow_ms:8.1f}ms  '
+                      f'({pandas_ms / arrow_ms if arrow_ms else float("inf"):.1f}x)')
+
+    gravar_resultados({
+        'commit': commit_atual(),
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'pyarrow': pa.__version__,
+        'parametros': {
+            'repeticoes': args.repeticoes,
+            'regiao': args.regiao,
+            'indicador': args.indicador,
+        },
+        'resultados': resultados,
+    }, args.saida)
+    print(f'Resultados gravados em {args.saida}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+"""
+Benchmark do pipeline do dashboard em escala
+
+Reproduz as etapas de `streamlit_app.py` sobre dados sintéticos com o mesmo
+esquema do dataset de bairros e mede cada etapa separadamente:
+- carregar: leitura do snapshot Arrow gerado para o tamanho, no esquema compacto
+- filtrar: seleção por região
+- construir_cubo: cubo de agregados por região, calculado uma vez por carga
+- agregar: leitura das estatísticas por região a partir do cubo
+- construir_figuras: gráfico espacial (Scattergl) e ranking de bairros (top N)
+- serializar_figuras: conversão das figuras para JSON
+
+Os resultados são acrescentados a um arquivo JSON, um registro por execução,
+identificado pelo commit atual, para acompanhar regressões entre commits.
+
+Exemplo:
+
+    python benchmarks/benchmark_pipeline.py --tamanhos 10000 100000 1000000
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.append(str(RAIZ))
+
+import pandas as pd
+import plotly
+
+from natal_dados import carregar_snapshot, compactar_tipos, construir_snapshot
+from natal_dados.agregados import construir_cubo, estatisticas_por_regiao
+from natal_dados.graficos import BARRAS_TOP_N, figura_barras, figura_comparacao, figura_espacial
+from natal_dados.sintetico import gerar_bairros
+
+SAIDA_PADRAO = Path(__file__).resolve().parent / 'resultados' / 'pipeline.json'
+
+
+def etapa_carregar(caminho):
+    return compactar_tipos(carregar_snapshot(caminho))
+
+
+def etapa_filtrar(df, regiao):
+    if regiao != 'Todas':
+        return df[df['regiao'] == regiao.lower()]
+    return df.copy()
+
+
+def etapa_agregar(cubo, coluna):
+    return estatisticas_por_regiao(cubo, coluna)
+
+
+def etapa_construir_figuras(df_filtrado, stats_regiao, coluna):
+    fig_espacial = figura_espacial(df_filtrado, coluna, coluna)
+
+    fig_barras = figura_barras(df_filtrado, coluna, coluna, top_n=BARRAS_TOP_N)
+    fig_comparacao = figura_comparacao(
+        stats_regiao.rename(columns={'regiao': 'Região', 'mean': 'Média'}), coluna
+    )
+
+    return [fig_espacial, fig_barras, fig_comparacao]
+
+
+def etapa_serializar_figuras(figuras):
+    return [fig.to_json() for fig in figuras]
+
+
+def cronometrar(funcao, *args):
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    return time.perf_counter() - inicio, resultado
+
+
+def medir(n, repeticoes, regiao, coluna, diretorio, com_figuras=True):
+    """Executa o pipeline `repeticoes` vezes para um tamanho e resume os tempos."""
+    caminho = Path(diretorio) / f'sintetico_{n}.arrow'
+    construir_snapshot(compactar_tipos(gerar_bairros(n)), caminho)
+
+    tempos = {}
+    bytes_payload = None
+    for _ in range(repeticoes):
+        etapas = {}
+        etapas['carregar'], df = cronometrar(etapa_carregar, caminho)
+        etapas['filtrar'], df_filtrado = cronometrar(etapa_filtrar, df, regiao)
+        etapas['construir_cubo'], cubo = cronometrar(construir_cubo, df)
+        etapas['agregar'], stats_regiao = cronometrar(etapa_agregar, cubo, coluna)
+        if com_figuras:
+            etapas['construir_figuras'], figuras = cronometrar(
+                etapa_construir_figuras, df_filtrado, stats_regiao, coluna
+            )
+            etapas['serializar_figuras'], jsons = cronometrar(etapa_serializar_figuras, figuras)
+            bytes_payload = sum(len(j) for j in jsons)
+        for etapa, segundos in etapas.items():
+            tempos.setdefault(etapa, []).append(segundos)
+
+    return {
+        'n': n,
+        'linhas_filtradas': len(df_filtrado),
+        'bytes_figuras': bytes_payload,
+        'etapas': {
+            etapa: {
+                'mediana_s': statistics.median(valores),
+                'minimo_s': min(valores),
+                'maximo_s': max(valores),
+            }
+            for etapa, valores in tempos.items()
+        },
+    }
+
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def gravar_resultados(registro, saida):
+    """Acrescenta o registro da execução à lista guardada em `saida`."""
+    saida = Path(saida)
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    historico = json.loads(saida.read_text()) if saida.exists() else []
+    historico.append(registro)
+    saida.write_text(json.dumps(historico, indent=2, ensure_ascii=False) + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--regiao', default='Todas')
+    parser.add_argument('--indicador', default='renda_mensal_pessoa')
+    parser.add_argument('--sem-figuras', action='store_true',
+                        help='pula a construção e serialização das figuras')
+    parser.add_argument('--saida', default=SAIDA_PADRAO)
+    args = parser.parse_args(argv)
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        for n in args.tamanhos:
+            resultado = medir(n, args.repeticoes, args.regiao, args.indicador,
+                              diretorio, com_figuras=not args.sem_figuras)
+            resultados.append(resultado)
+            resumo = ', '.join(
+                f"{etapa}={dados['mediana_s'] * 1e3:.1f}ms"
+                for etapa, dados in resultado['etapas'].items()
+            )
+            print(f'n={n}: {resumo}')
+
+    gravar_resultados({
+        'commit': commit_atual(),
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'plotly': plotly.__version__,
+        'parametros': {
+            'repeticoes': args.repeticoes,
+            'regiao': args.regiao,
+            'indicador': args.indicador,
+        },
+        'resultados': resultados,
+    }, args.saida)
+    print(f'Resultados gravados em {args.saida}')
+
+
+if __name__ == '__main__':
+    main()
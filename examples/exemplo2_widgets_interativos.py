@@ -20,6 +20,17 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 
+# Permite importar o pacote natal_dados a partir da pasta examples/
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from natal_dados.armazem import obter_armazem
+from natal_dados.busca import indice_busca
+from natal_dados.juncao import JuncaoIncremental, indice_chave
+from natal_dados.quantis import descrever
+from natal_dados.upload import ErroEsquema, ler_csv_em_blocos
+
 # Configuração básica da página
 st.set_page_config(page_title="Exemplo 2: Widgets Interativos", page_icon="🎛️")
 
@@ -27,28 +38,10 @@ st.set_page_config(page_title="Exemplo 2: Widgets Interativos", page_icon="🎛
 st.title('Widgets Interativos do Streamlit')
 st.markdown('Este exemplo demonstra os principais widgets interativos disponíveis no Streamlit usando dados de Natal/RN.')
 
-# Função para carregar os dados
-@st.cache_data
-def carregar_dados():
-    # Carrega o dataset contendo informações socioeconômicas dos bairros de Natal/RN diretamente do GitHub
-    df = pd.read_csv('https://raw.githubusercontent.com/igendriz/DCA3501-Ciencia-Dados/main/Dataset/Bairros_Natal_v01.csv')
-    
-    # Remove linhas com quaisquer valores ausentes (NaN)
-    df = df.dropna()
-    
-    # Corrige nomes específicos de bairros para padronização (sem acentos ou espaços)
-    df.loc[0, "bairro"] = 'ns_apresentacao'   # Nossa Senhora da Apresentação
-    df.loc[34, "bairro"] = 'ns_nazare'        # Nossa Senhora de Nazaré
-    df.loc[32, "bairro"] = 'c_esperanca'      # Cidade da Esperança
-    
-    # Remove a coluna 'Unnamed: 0', gerada automaticamente pelo salvamento anterior do CSV
-    if 'Unnamed: 0' in df.columns:
-        df = df.drop(columns='Unnamed: 0')
-    
-    return df
-
-# Carrega os dados
-df_natal = carregar_dados()
+# Os dados vêm do armazém compartilhado do processo. Cada seção lê só as
+# colunas que usa (`armazem.colunas`); o DataFrame completo só é carregado
+# pelas seções que mostram linhas inteiras, quando são usadas
+armazem = obter_armazem()
 
 # Sidebar para organizar os controles
 st.sidebar.header('Controles')
@@ -60,14 +53,16 @@ col1, col2 = st.columns(2)
 with col1:
     if st.button('Mostrar estatísticas'):
         st.write('Estatísticas básicas da renda mensal por pessoa:')
-        st.write(df_natal['renda_mensal_pessoa'].describe())
+        # Lidas do cubo de agregados e dos resumos de quantis por região,
+        # sem ordenar a coluna a cada clique
+        st.write(descrever('renda_mensal_pessoa', fonte=armazem.fonte))
     else:
         st.write('Clique no botão para ver estatísticas.')
     
     mostrar_mapa = st.checkbox('Mostrar mapa de regiões')
     if mostrar_mapa:
         st.write('Quantidade de bairros por região:')
-        st.write(df_natal['regiao'].value_counts())
+        st.write(armazem.colunas(['regiao'])['regiao'].value_counts())
     
 st.divider()
 
@@ -78,19 +73,21 @@ col1, col2 = st.columns(2)
 with col1:
     bairro_busca = st.text_input('Digite o nome de um bairro para buscar')
     if bairro_busca:
-        resultados = df_natal[df_natal['bairro'].str.contains(bairro_busca.lower())]
+        # Busca no índice de trigramas, sem acentos e tolerante a erros de digitação
+        resultados = armazem.dados().iloc[indice_busca(armazem.fonte).buscar(bairro_busca)]
         if not resultados.empty:
             st.write(f'Resultados para "{bairro_busca}":')
             st.dataframe(resultados)
         else:
             st.warning(f'Nenhum bairro encontrado com "{bairro_busca}"')
     
+    renda = armazem.colunas(['renda_mensal_pessoa'])['renda_mensal_pessoa']
     limiar_renda = st.number_input('Limiar de renda mensal (R$)', 
-                                  min_value=float(df_natal['renda_mensal_pessoa'].min()), 
-                                  max_value=float(df_natal['renda_mensal_pessoa'].max()),
+                                  min_value=float(renda.min()), 
+                                  max_value=float(renda.max()),
                                   value=1000.0,
                                   step=100.0)
-    st.write(f'Bairros com renda acima de R$ {limiar_renda:.2f}: {len(df_natal[df_natal["renda_mensal_pessoa"] > limiar_renda])}')
+    st.write(f'Bairros com renda acima de R$ {limiar_renda:.2f}: {int((renda > limiar_renda).sum())}')
 
 with col2:
     notas = st.text_area('Anotações sobre a análise', height=100)
@@ -105,22 +102,27 @@ col1, col2 = st.columns(2)
 with col1:
     regiao = st.selectbox(
         'Escolha uma região',
-        ['Todas'] + sorted(df_natal['regiao'].unique().tolist())
+        ['Todas'] + sorted(armazem.colunas(['regiao'])['regiao'].unique().tolist())
     )
     
     if regiao != 'Todas':
         st.write(f'Dados da região {regiao}:')
+        df_natal = armazem.dados()
         st.dataframe(df_natal[df_natal['regiao'] == regiao])
     else:
         st.write('Mostrando todas as regiões')
     
+    # As opções vêm do esquema (ou do cabeçalho) da fonte, e só as colunas
+    # selecionadas são lidas; em arquivos largos, as colunas que ninguém
+    # seleciona não são lidas
+    colunas_disponiveis = armazem.colunas_disponiveis()
     colunas_selecionadas = st.multiselect(
         'Selecione as colunas para visualizar',
-        df_natal.columns.tolist(),
-        default=['bairro', 'regiao', 'populacao']
+        colunas_disponiveis,
+        default=[c for c in ['bairro', 'regiao', 'populacao'] if c in colunas_disponiveis]
     )
     if colunas_selecionadas:
-        st.dataframe(df_natal[colunas_selecionadas])
+        st.dataframe(armazem.colunas(colunas_selecionadas))
 
 with col2:
     metrica = st.radio(
@@ -138,30 +140,32 @@ with col2:
         coluna = 'populacao'
         unidade = 'habitantes'
     
+    valores = armazem.colunas([coluna])[coluna]
     st.write(f'Estatísticas de {metrica}:')
-    st.write(f'Média: {df_natal[coluna].mean():.2f} {unidade}')
-    st.write(f'Máximo: {df_natal[coluna].max():.2f} {unidade}')
-    st.write(f'Mínimo: {df_natal[coluna].min():.2f} {unidade}')
+    st.write(f'Média: {valores.mean():.2f} {unidade}')
+    st.write(f'Máximo: {valores.max():.2f} {unidade}')
+    st.write(f'Mínimo: {valores.min():.2f} {unidade}')
 
 # === Sliders ===
 st.header('Sliders')
 col1, col2 = st.columns(2)
 
 with col1:
-    n_bairros = st.slider('Número de bairros para mostrar', 1, len(df_natal), 5)
+    df_renda = armazem.colunas(['bairro', 'regiao', 'renda_mensal_pessoa'])
+    n_bairros = st.slider('Número de bairros para mostrar', 1, len(df_renda), 5)
     st.write(f'Top {n_bairros} bairros com maior renda:')
-    st.dataframe(df_natal.sort_values('renda_mensal_pessoa', ascending=False).head(n_bairros))
+    st.dataframe(df_renda.nlargest(n_bairros, 'renda_mensal_pessoa'))
 
 with col2:
+    df_populacao = armazem.colunas(['bairro', 'regiao', 'populacao'])
     faixa_populacao = st.slider(
         'Faixa de população',
-        float(df_natal['populacao'].min()), 
-        float(df_natal['populacao'].max()),
+        float(df_populacao['populacao'].min()), 
+        float(df_populacao['populacao'].max()),
         (10000.0, 30000.0)
     )
     st.write(f'Bairros com população entre {faixa_populacao[0]:.0f} e {faixa_populacao[1]:.0f} habitantes:')
-    filtro_pop = df_natal[(df_natal['populacao'] >= faixa_populacao[0]) & 
-                          (df_natal['populacao'] <= faixa_populacao[1])]
+    filtro_pop = df_populacao[df_populacao['populacao'].between(*faixa_populacao)]
     st.dataframe(filtro_pop)
 
 # === Seletores de Data e Hora ===
@@ -179,14 +183,85 @@ with col2:
 
 # === Upload de Arquivo ===
 st.header('Upload de Arquivo')
-st.write("Você pode fazer upload de um arquivo CSV com dados adicionais para complementar a análise:")
+st.write("Você pode fazer upload de um arquivo CSV com dados adicionais para complementar a análise. As colunas numéricas do arquivo são associadas aos bairros pela coluna-chave escolhida:")
 arquivo = st.file_uploader("Escolha um arquivo CSV")
 if arquivo is not None:
+    df_natal = armazem.dados()
     try:
-        # Tenta ler como CSV
-        df_upload = pd.read_csv(arquivo)
-        st.write('Visualização dos dados enviados:')
-        st.dataframe(df_upload.head())
+        # Só o cabeçalho é lido aqui, para a escolha das colunas-chave
+        colunas_arquivo = pd.read_csv(arquivo, nrows=0).columns.tolist()
+        arquivo.seek(0)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            chave_arquivo = st.selectbox(
+                'Coluna-chave do arquivo',
+                colunas_arquivo,
+                index=colunas_arquivo.index('bairro') if 'bairro' in colunas_arquivo else 0
+            )
+        with col2:
+            chave_base = st.selectbox(
+                'Coluna-chave dos dados de Natal',
+                [c for c in df_natal.columns if not pd.api.types.is_numeric_dtype(df_natal[c])]
+            )
+
+        # Índice hash da coluna-chave (nomes normalizados), construído uma vez por carga
+        indice = indice_chave(chave_base, armazem.fonte)
+        if indice.duplicadas:
+            st.warning(f'A coluna {chave_base} tem {indice.duplicadas} valores repetidos; '
+                       'cada chave do arquivo é associada só à primeira linha.')
+
+        # A junção fica na sessão: as próximas execuções do script não leem o arquivo de novo
+        identificador = (arquivo.file_id, chave_arquivo, chave_base)
+        if st.session_state.get('juncao_upload', (None,))[0] != identificador:
+            # Lê o CSV em blocos: a prévia aparece com o primeiro bloco, o resumo
+            # é atualizado a cada bloco e cada bloco é juntado aos dados de Natal
+            # pelo índice, sem manter o arquivo inteiro em memória
+            juncao = JuncaoIncremental(indice, chave_arquivo, df_natal.columns)
+            st.write('Visualização dos dados enviados:')
+            area_previa = st.empty()
+            area_progresso = st.empty()
+            area_resumo = st.empty()
+            for bloco, resumo in ler_csv_em_blocos(arquivo, colunas_obrigatorias=[chave_arquivo]):
+                if resumo.blocos == 1:
+                    area_previa.dataframe(bloco.head())
+                juncao.atualizar(bloco)
+                area_progresso.write(f'{resumo.linhas} linhas lidas, {juncao.casadas} associadas a bairros')
+                area_resumo.dataframe(resumo.tabela())
+            st.session_state['juncao_upload'] = (
+                identificador,
+                juncao.colunas_juntadas(df_natal.index),
+                juncao.nao_encontradas(),
+                juncao.resumo(),
+            )
+
+        _, colunas_juntadas, nao_encontradas, resumo_juncao = st.session_state['juncao_upload']
+        st.write(f"Junção por **{chave_arquivo}** → **{chave_base}**: "
+                 f"{resumo_juncao['casadas']} de {resumo_juncao['linhas']} linhas associadas, "
+                 f"{resumo_juncao['bairros_preenchidos']} bairros preenchidos.")
+        if resumo_juncao['repetidas']:
+            st.info(f"{resumo_juncao['repetidas']} linhas repetem uma chave; vale a última ocorrência.")
+        if resumo_juncao['ignoradas']:
+            st.caption(f"Colunas não numéricas ignoradas: {', '.join(resumo_juncao['ignoradas'])}")
+        if not nao_encontradas.empty:
+            with st.expander(f'{len(nao_encontradas)} chaves sem correspondência'):
+                st.dataframe(nao_encontradas)
+
+        # As colunas numéricas juntadas viram indicadores selecionáveis na sidebar.
+        # O concat não copia os dados de Natal: as colunas são só reunidas
+        if not colunas_juntadas.empty:
+            indicador_upload = st.sidebar.selectbox(
+                'Indicador do arquivo enviado', colunas_juntadas.columns.tolist()
+            )
+            df_enriquecido = pd.concat([df_natal, colunas_juntadas], axis=1, copy=False)
+            st.write(f'Bairros com maior {indicador_upload}:')
+            st.bar_chart(
+                df_enriquecido.nlargest(30, indicador_upload)
+                .set_index('bairro')[indicador_upload]
+            )
+    except ErroEsquema as e:
+        st.error(f'O arquivo não segue o formato esperado: {e}')
+        st.info('Confira o cabeçalho e os valores das colunas numéricas.')
     except Exception as e:
         st.error(f'Erro ao ler o arquivo: {e}')
         st.info('Tente fazer upload de um arquivo CSV válido.')
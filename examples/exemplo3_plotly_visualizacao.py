@@ -13,9 +13,17 @@ Data: Junho 2024
 """
 
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
+
+# Permite importar o pacote natal_dados a partir da pasta examples/
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from natal_dados.armazem import obter_armazem
+from natal_dados.graficos import BARRAS_TOP_N, dados_ranking, figura_espacial
+from natal_dados.indices import indices_ordenados
+from natal_dados.tabela import tabela_paginada
 
 # Configuração básica da página
 st.set_page_config(page_title="Exemplo 3: Visualização com Plotly", page_icon="📊")
@@ -24,32 +32,14 @@ st.set_page_config(page_title="Exemplo 3: Visualização com Plotly", page_icon=
 st.title('Visualizações com Plotly no Streamlit')
 st.markdown('Este exemplo demonstra como integrar gráficos interativos do Plotly em aplicações Streamlit usando os dados de Natal/RN.')
 
-# Função para carregar os dados
-@st.cache_data
-def carregar_dados():
-    # Carrega o dataset contendo informações socioeconômicas dos bairros de Natal/RN diretamente do GitHub
-    df = pd.read_csv('https://raw.githubusercontent.com/igendriz/DCA3501-Ciencia-Dados/main/Dataset/Bairros_Natal_v01.csv')
-    
-    # Remove linhas com quaisquer valores ausentes (NaN)
-    df = df.dropna()
-    
-    # Corrige nomes específicos de bairros para padronização (sem acentos ou espaços)
-    df.loc[0, "bairro"] = 'ns_apresentacao'   # Nossa Senhora da Apresentação
-    df.loc[34, "bairro"] = 'ns_nazare'        # Nossa Senhora de Nazaré
-    df.loc[32, "bairro"] = 'c_esperanca'      # Cidade da Esperança
-    
-    # Remove a coluna 'Unnamed: 0', gerada automaticamente pelo salvamento anterior do CSV
-    if 'Unnamed: 0' in df.columns:
-        df = df.drop(columns='Unnamed: 0')
-    
-    return df
-
-# Carrega os dados
-df_natal = carregar_dados()
+# Carrega os dados pelo armazém compartilhado do processo
+armazem = obter_armazem()
+df_natal = armazem.dados()
 
 # Exibindo os dados
 st.header('Dados dos Bairros de Natal/RN')
-st.dataframe(df_natal)
+# Só a página visível é enviada ao navegador, não o DataFrame inteiro
+tabela_paginada(df_natal, chave='ex3_dados', indices=indices_ordenados(armazem.fonte))
 
 # Gráfico de barras com Plotly Express
 st.header('Gráfico de Barras')
@@ -97,51 +87,15 @@ st.plotly_chart(fig_scatter, use_container_width=True)
 
 # Visualização espacial com Plotly
 st.header('Visualização Espacial')
-st.markdown('Usando `go.Scatter` para criar uma visualização espacial dos bairros:')
-
-# Dicionário com cores atribuídas para cada região
-cores_regiao = {
-    'norte': 'blue',
-    'sul': 'green',
-    'leste': 'orange',
-    'oeste': 'red'
-}
-
-# Criar figura Plotly para visualização espacial
-fig_espacial = go.Figure()
-
-# Adicionar pontos para cada região
-for regiao, grupo in df_natal.groupby('regiao'):
-    fig_espacial.add_trace(go.Scatter(
-        x=grupo['x'] / 1e3,  # Converter para km
-        y=grupo['y'] / 1e3,  # Converter para km
-        mode='markers+text',
-        marker=dict(
-            size=grupo['rendimento_nominal_medio'] * 10,  # Tamanho proporcional ao rendimento
-            color=cores_regiao.get(regiao, 'gray'),
-            opacity=0.8,
-            line=dict(width=1, color='black')
-        ),
-        text=grupo['bairro'],
-        textposition="top center",
-        name=regiao.capitalize(),
-        hovertemplate=(
-            "<b>%{text}</b><br>" +
-            f"Região: {regiao.capitalize()}<br>" +
-            "Rendimento: %{marker.size:.1f} sal. mín.<br>" +
-            "Coordenada X: %{x:.2f} km<br>" +
-            "Coordenada Y: %{y:.2f} km"
-        )
-    ))
-
-# Configurações do layout
-fig_espacial.update_layout(
-    title="Distribuição Espacial dos Bairros por Rendimento",
-    xaxis_title="Coordenada X (km)",
-    yaxis_title="Coordenada Y (km)",
-    legend_title="Região",
-    height=600,
-    hovermode='closest'
+st.markdown('Usando `go.Scattergl` para criar uma visualização espacial dos bairros:')
+
+# Criar figura Plotly para visualização espacial: um único traço Scattergl
+# (WebGL), com a cor definida pela região e rótulos só nos maiores valores
+fig_espacial = figura_espacial(
+    df_natal,
+    'rendimento_nominal_medio',
+    'Rendimento (sal. mín.)',
+    titulo="Distribuição Espacial dos Bairros por Rendimento"
 )
 
 # Exibir o gráfico
@@ -166,12 +120,18 @@ rotulos = {
 # Checkbox para mostrar valores nos gráficos
 show_values = st.checkbox('Mostrar valores no gráfico', value=True)
 
+# Quantidade de maiores e menores bairros; com mais bairros que isso, os do
+# meio do ranking são agregados em uma barra "Outros"
+top_n = st.slider('Bairros no ranking (maiores e menores)', 5, 50, BARRAS_TOP_N)
+dados_grafico = dados_ranking(df_natal, y_var, top_n)
+
 # Criando gráfico baseado na seleção
 fig_interactive = px.bar(
-    df_natal.sort_values(by=y_var, ascending=False), 
+    dados_grafico, 
     x='bairro', 
     y=y_var,
     color='regiao',
+    color_discrete_map={'outros': 'gray'},
     title=f'{rotulos[y_var]} por Bairro',
     text=y_var if show_values else None,
     labels={'bairro': 'Bairro', y_var: rotulos[y_var]}
@@ -183,7 +143,8 @@ if show_values:
 # Ajustando layout para melhor visualização
 fig_interactive.update_layout(
     xaxis_tickangle=-45,
-    height=500
+    height=500,
+    xaxis=dict(categoryorder='array', categoryarray=dados_grafico['bairro'].tolist())
 )
 
 # Exibindo o gráfico interativo
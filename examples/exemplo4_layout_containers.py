@@ -16,9 +16,19 @@ Data: Junho 2024
 """
 
 import streamlit as st
-import pandas as pd
 import numpy as np
 
+# Permite importar o pacote natal_dados a partir da pasta examples/
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from natal_dados.armazem import obter_armazem
+from natal_dados.filtros import obter_filtro
+from natal_dados.indices import indices_ordenados
+from natal_dados.quantis import descrever
+from natal_dados.tabela import tabela_paginada
+
 # Configuração básica da página
 st.set_page_config(page_title="Exemplo 4: Layout e Containers", page_icon="📑")
 
@@ -26,28 +36,9 @@ st.set_page_config(page_title="Exemplo 4: Layout e Containers", page_icon="📑"
 st.title('Layout e Containers no Streamlit')
 st.markdown('Este exemplo demonstra como organizar sua aplicação usando diferentes opções de layout, utilizando dados de Natal/RN.')
 
-# Função para carregar os dados
-@st.cache_data
-def carregar_dados():
-    # Carrega o dataset contendo informações socioeconômicas dos bairros de Natal/RN diretamente do GitHub
-    df = pd.read_csv('https://raw.githubusercontent.com/igendriz/DCA3501-Ciencia-Dados/main/Dataset/Bairros_Natal_v01.csv')
-    
-    # Remove linhas com quaisquer valores ausentes (NaN)
-    df = df.dropna()
-    
-    # Corrige nomes específicos de bairros para padronização (sem acentos ou espaços)
-    df.loc[0, "bairro"] = 'ns_apresentacao'   # Nossa Senhora da Apresentação
-    df.loc[34, "bairro"] = 'ns_nazare'        # Nossa Senhora de Nazaré
-    df.loc[32, "bairro"] = 'c_esperanca'      # Cidade da Esperança
-    
-    # Remove a coluna 'Unnamed: 0', gerada automaticamente pelo salvamento anterior do CSV
-    if 'Unnamed: 0' in df.columns:
-        df = df.drop(columns='Unnamed: 0')
-    
-    return df
-
-# Carrega os dados
-df_natal = carregar_dados()
+# Carrega os dados pelo armazém compartilhado do processo
+armazem = obter_armazem()
+df_natal = armazem.dados()
 
 # === Colunas ===
 st.header('Colunas')
@@ -83,7 +74,7 @@ with st.container():
     st.write("Este container mostra a distribuição de população por região.")
     
     # Calculando a população total por região
-    pop_por_regiao = df_natal.groupby('regiao')['populacao'].sum().reset_index()
+    pop_por_regiao = df_natal.groupby('regiao', observed=True)['populacao'].sum().reset_index()
     
     # Criando um gráfico de barras simples
     st.bar_chart(pop_por_regiao.set_index('regiao'))
@@ -104,7 +95,7 @@ with st.expander("Clique para ver detalhes sobre rendimento nominal médio"):
     st.dataframe(top_bairros[['bairro', 'regiao', 'rendimento_nominal_medio']])
     
     st.write("Estatísticas de rendimento nominal médio por região:")
-    st.dataframe(df_natal.groupby('regiao')['rendimento_nominal_medio'].agg(['mean', 'min', 'max']).round(2))
+    st.dataframe(df_natal.groupby('regiao', observed=True)['rendimento_nominal_medio'].agg(['mean', 'min', 'max']).round(2))
 
 # === Tabs ===
 st.header('Abas')
@@ -117,7 +108,7 @@ with tab1:
     st.write("Renda mensal por pessoa em cada região:")
     
     # Calculando a média de renda por região
-    renda_por_regiao = df_natal.groupby('regiao')['renda_mensal_pessoa'].mean().reset_index()
+    renda_por_regiao = df_natal.groupby('regiao', observed=True)['renda_mensal_pessoa'].mean().reset_index()
     
     # Criando um gráfico de barras
     st.bar_chart(renda_por_regiao.set_index('regiao'))
@@ -125,15 +116,23 @@ with tab1:
 with tab2:
     st.header("Visualização em Tabela")
     st.write("Dados completos dos bairros:")
-    st.dataframe(df_natal)
+    # Tabela paginada no servidor: só a página visível é enviada ao navegador
+    tabela_paginada(df_natal, chave='ex4_tabela', indices=indices_ordenados(armazem.fonte))
 
 with tab3:
     st.header("Estatísticas")
+    # As estatísticas de qualquer combinação de regiões saem do cubo de
+    # agregados e da combinação dos resumos de quantis de cada região,
+    # sem percorrer as linhas
+    regioes_estatisticas = st.multiselect(
+        "Regiões:", sorted(df_natal['regiao'].unique().tolist()),
+        default=sorted(df_natal['regiao'].unique().tolist())
+    )
     st.write("Estatísticas descritivas da população:")
-    st.dataframe(df_natal['populacao'].describe().round(2))
+    st.dataframe(descrever('populacao', regioes_estatisticas, fonte=armazem.fonte).round(2))
     
     st.write("Estatísticas descritivas da renda mensal por pessoa:")
-    st.dataframe(df_natal['renda_mensal_pessoa'].describe().round(2))
+    st.dataframe(descrever('renda_mensal_pessoa', regioes_estatisticas, fonte=armazem.fonte).round(2))
 
 # === Sidebar ===
 st.sidebar.header('Filtros na Sidebar')
@@ -142,12 +141,16 @@ st.sidebar.write('A sidebar é útil para controles e filtros.')
 # Adicionando filtros na sidebar
 regiao_filtro = st.sidebar.selectbox('Filtrar por região:', ['Todas'] + sorted(df_natal['regiao'].unique().tolist()))
 
+# O motor de filtros fica na sessão e guarda uma máscara por filtro, de modo
+# que mover o slider não refaz o filtro de região
+filtro = obter_filtro(st.session_state, df_natal, indices_ordenados(armazem.fonte))
+
 if regiao_filtro != 'Todas':
-    df_filtrado = df_natal[df_natal['regiao'] == regiao_filtro]
-    st.sidebar.write(f"Mostrando {len(df_filtrado)} bairros da região {regiao_filtro}.")
+    filtro.igual('regiao', 'regiao', regiao_filtro)
+    st.sidebar.write(f"Mostrando {len(filtro)} bairros da região {regiao_filtro}.")
 else:
-    df_filtrado = df_natal
-    st.sidebar.write(f"Mostrando todos os {len(df_filtrado)} bairros.")
+    filtro.remover('regiao')
+    st.sidebar.write(f"Mostrando todos os {len(filtro)} bairros.")
 
 # Adicionando um slider para filtrar por população
 pop_min, pop_max = st.sidebar.slider(
@@ -157,12 +160,13 @@ pop_min, pop_max = st.sidebar.slider(
     value=(int(df_natal['populacao'].min()), int(df_natal['populacao'].max()))
 )
 
-df_filtrado = df_filtrado[(df_filtrado['populacao'] >= pop_min) & (df_filtrado['populacao'] <= pop_max)]
-st.sidebar.write(f"Bairros selecionados: {len(df_filtrado)}")
+filtro.intervalo('populacao', 'populacao', pop_min, pop_max)
+st.sidebar.write(f"Bairros selecionados: {len(filtro)}")
 
 # Exibindo os resultados filtrados
 st.header('Resultados Filtrados')
-st.dataframe(df_filtrado)
+# As posições do filtro são paginadas direto, sem materializar o DataFrame filtrado
+tabela_paginada(df_natal, chave='ex4_filtrados', posicoes=filtro.indices(), indices=indices_ordenados(armazem.fonte))
 
 # Nota de rodapé
 st.caption('Este exemplo demonstra as diferentes opções de layout disponíveis no Streamlit para organizar sua aplicação, utilizando dados reais de Natal/RN.')
@@ -16,10 +16,19 @@ Data: Junho 2024
 """
 
 import streamlit as st
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+# Permite importar o pacote natal_dados a partir da pasta examples/
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from natal_dados.armazem import obter_armazem
+from natal_dados.agregados import cubo_regioes, estatisticas_por_regiao
+from natal_dados.colunar import obter_filtro_arrow, tabela_arrow
+from natal_dados.tabela import tabela_paginada
+
 # Configuração básica da página
 st.set_page_config(page_title="Exemplo 5: Filtros e Dados Reais", page_icon="🔍")
 
@@ -27,28 +36,9 @@ st.set_page_config(page_title="Exemplo 5: Filtros e Dados Reais", page_icon="
 st.title('Filtros e Análise de Dados Reais')
 st.markdown('Este exemplo demonstra como implementar filtros interativos para análise dos dados socioeconômicos de Natal/RN.')
 
-# Função para carregar os dados
-@st.cache_data
-def carregar_dados():
-    # Carrega o dataset contendo informações socioeconômicas dos bairros de Natal/RN diretamente do GitHub
-    df = pd.read_csv('https://raw.githubusercontent.com/igendriz/DCA3501-Ciencia-Dados/main/Dataset/Bairros_Natal_v01.csv')
-    
-    # Remove linhas com quaisquer valores ausentes (NaN)
-    df = df.dropna()
-    
-    # Corrige nomes específicos de bairros para padronização (sem acentos ou espaços)
-    df.loc[0, "bairro"] = 'ns_apresentacao'   # Nossa Senhora da Apresentação
-    df.loc[34, "bairro"] = 'ns_nazare'        # Nossa Senhora de Nazaré
-    df.loc[32, "bairro"] = 'c_esperanca'      # Cidade da Esperança
-    
-    # Remove a coluna 'Unnamed: 0', gerada automaticamente pelo salvamento anterior do CSV
-    if 'Unnamed: 0' in df.columns:
-        df = df.drop(columns='Unnamed: 0')
-    
-    return df
-
-# Carrega os dados
-df_natal = carregar_dados()
+# Carrega os dados pelo armazém compartilhado do processo
+armazem = obter_armazem()
+df_natal = armazem.dados()
 
 # Sidebar para filtros
 st.sidebar.header("Filtros")
@@ -76,18 +66,26 @@ limiar = st.sidebar.slider(
 )
 
 # Aplicar filtros
-if regiao_selecionada != "Todas":
-    df_filtrado = df_natal[df_natal["regiao"] == regiao_selecionada.lower()]
-else:
-    df_filtrado = df_natal.copy()
-
-# Filtro por limiar
-df_filtrado = df_filtrado[(df_filtrado[coluna_indicador] >= limiar[0]) & 
-                          (df_filtrado[coluna_indicador] <= limiar[1])]
+# Os filtros rodam sobre a tabela Arrow do dataset, com kernels do
+# pyarrow.compute. O motor fica na sessão e guarda uma máscara por filtro:
+# mover o slider recalcula apenas a máscara do limiar, e a da região é
+# reaproveitada. O resultado é uma tabela Arrow, usada sem conversão pela
+# tabela, pelos gráficos e pela exportação
+filtro = obter_filtro_arrow(st.session_state, tabela_arrow(armazem.fonte))
+filtro.igual("regiao", "regiao", regiao_selecionada.lower() if regiao_selecionada != "Todas" else None)
+filtro.intervalo("limiar", coluna_indicador, limiar[0], limiar[1])
+tabela_filtrada = filtro.linhas()
 
 # Exibir dados filtrados
 st.header("Dados Filtrados")
-st.dataframe(df_filtrado)
+# Só a página visível é serializada; ordenar e trocar de página não reenviam a tabela inteira
+tabela_paginada(tabela_filtrada, chave="ex5_filtrados", hide_index=True)
+st.download_button(
+    "Baixar dados filtrados (CSV)",
+    data=filtro.csv(),
+    file_name="bairros_natal_filtrados.csv",
+    mime="text/csv"
+)
 
 # Visualizações
 st.header("Visualizações")
@@ -100,7 +98,7 @@ with col1:
     st.subheader(f"{indicador_selecionado} por Bairro")
     
     fig_bar = px.bar(
-        df_filtrado.sort_values(by=coluna_indicador, ascending=False),
+        tabela_filtrada.sort_by([(coluna_indicador, "descending")]),
         x="bairro",
         y=coluna_indicador,
         color="regiao",
@@ -129,7 +127,7 @@ with col2:
     coluna_segundo = indicadores[segundo_indicador]
     
     fig_scatter = px.scatter(
-        df_filtrado,
+        tabela_filtrada,
         x=coluna_indicador,
         y=coluna_segundo,
         color="regiao",
@@ -154,8 +152,9 @@ if regiao_selecionada != "Todas":
 else:
     st.write("Estatísticas por região:")
 
-# Calcular estatísticas por região
-stats_regiao = df_natal.groupby('regiao')[coluna_indicador].agg(['mean', 'min', 'max', 'count']).reset_index()
+# Estatísticas por região, lidas do cubo de agregados calculado na carga dos dados
+stats_regiao = estatisticas_por_regiao(cubo_regioes(armazem.fonte), coluna_indicador)
+stats_regiao = stats_regiao[['regiao', 'mean', 'min', 'max', 'count']]
 stats_regiao.columns = ['Região', 'Média', 'Mínimo', 'Máximo', 'Quantidade de Bairros']
 
 # Formatar valores numéricos
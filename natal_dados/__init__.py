@@ -0,0 +1,48 @@
+"""
+Camada de dados compartilhada pela aplicação principal e pelos exemplos.
+
+Uso típico em um script Streamlit:
+
+    from natal_dados import carregar_dados
+    df_natal = carregar_dados()
+"""
+
+from .carregamento import (
+    CAMINHO_SNAPSHOT,
+    TTL_PADRAO,
+    URL_DADOS,
+    carregar_colunas,
+    carregar_dados,
+    colunas_disponiveis,
+    compactar_tipos,
+    invalidar_cache,
+    limpar_dados,
+    memoria_por_coluna,
+    obter_derivado,
+    resolver_fonte,
+)
+from .snapshot import (
+    carregar_snapshot,
+    construir_snapshot,
+    hash_snapshot,
+    ler_tabela_snapshot,
+)
+
+__all__ = [
+    'CAMINHO_SNAPSHOT',
+    'TTL_PADRAO',
+    'URL_DADOS',
+    'carregar_colunas',
+    'carregar_dados',
+    'colunas_disponiveis',
+    'compactar_tipos',
+    'invalidar_cache',
+    'limpar_dados',
+    'memoria_por_coluna',
+    'obter_derivado',
+    'resolver_fonte',
+    'carregar_snapshot',
+    'construir_snapshot',
+    'hash_snapshot',
+    'ler_tabela_snapshot',
+]
@@ -0,0 +1,44 @@
+"""
+Gera os snapshots Arrow do dataset limpo.
+
+    python -m natal_dados [fonte] [destino]
+    python -m natal_dados --particoes [cidade ...]
+
+Sem argumentos, lê a fonte configurada (NATAL_DADOS_FONTE ou, sem ela, o
+CSV original) e grava em natal_dados/snapshot/. Com
+`--particoes`, grava uma partição por região de cada cidade informada (por
+padrão, todas as registradas) em natal_dados/particoes/.
+"""
+
+import sys
+from pathlib import Path
+
+from .carregamento import URL_DADOS, carregar_dados, resolver_fonte
+from .registro import DATASETS, caminho_particao, construir_particoes
+from .snapshot import CAMINHO_SNAPSHOT, construir_snapshot
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    if argv and argv[0] == '--particoes':
+        for nome in argv[1:] or list(DATASETS):
+            for regiao, digest in construir_particoes(nome).items():
+                print(f'Partição gravada em {caminho_particao(nome, regiao)} (sha256: {digest})')
+        return
+
+    fonte = argv[0] if len(argv) > 0 else None
+    destino = argv[1] if len(argv) > 1 else CAMINHO_SNAPSHOT
+
+    # Sem fonte, vale a mesma resolução do carregamento; o snapshot que está
+    # sendo regravado não serve de origem para ele mesmo, e aí vale a URL
+    tipo, local = resolver_fonte(fonte)
+    if fonte is None and tipo == 'snapshot' and Path(local) == Path(destino).resolve():
+        fonte = URL_DADOS
+
+    digest = construir_snapshot(carregar_dados(fonte), destino)
+    print(f'Snapshot gravado em {destino} (sha256: {digest})')
+
+
+if __name__ == '__main__':
+    main()
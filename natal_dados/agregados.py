@@ -0,0 +1,81 @@
+"""
+Cubo de agregados por região
+
+Em vez de refazer `groupby('regiao').agg(...)` a cada interação, o cubo guarda,
+para cada região e para cada indicador, as estatísticas aditivas:
+contagem, soma, soma dos quadrados, mínimo e máximo.
+
+A partir delas, média, variância e desvio padrão saem em O(regiões), e
+qualquer combinação de regiões pode ser obtida somando as linhas do cubo.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .carregamento import obter_derivado
+
+# Indicadores socioeconômicos numéricos do dataset
+INDICADORES = ['renda_mensal_pessoa', 'rendimento_nominal_medio', 'populacao']
+
+ESTATISTICAS = ['count', 'sum', 'sum_sq', 'min', 'max']
+
+
+def construir_cubo(df, colunas=INDICADORES, por='regiao'):
+    """
+    Calcula o cubo de agregados em uma única passada pelos dados.
+
+    Retorna um DataFrame indexado pela região, com colunas em dois níveis:
+    (indicador, estatística).
+    """
+    # Acumula em float64 mesmo quando as colunas estão em float32/int32
+    valores = df[colunas].astype('float64')
+    grupos = valores.groupby(df[por], observed=True, sort=True)
+    cubo = grupos.agg(['count', 'sum', 'min', 'max'])
+
+    soma_quadrados = (valores ** 2).groupby(df[por], observed=True, sort=True).sum()
+    for coluna in colunas:
+        cubo[(coluna, 'sum_sq')] = soma_quadrados[coluna]
+
+    cubo = cubo.reindex(columns=pd.MultiIndex.from_product([colunas, ESTATISTICAS]))
+    cubo.index.name = por
+    return cubo
+
+
+def cubo_regioes(fonte=None):
+    """Retorna o cubo do dataset carregado, calculado uma vez por carga."""
+    return obter_derivado('cubo_regioes', construir_cubo, fonte)
+
+
+def estatisticas_por_regiao(cubo, coluna):
+    """
+    Lê do cubo as estatísticas de um indicador, uma linha por região.
+
+    Colunas: regiao, mean, min, max, count, std.
+    """
+    parte = cubo[coluna]
+    contagem = parte['count']
+    media = parte['sum'] / contagem
+    variancia = (parte['sum_sq'] - contagem * media ** 2) / (contagem - 1)
+    return pd.DataFrame({
+        'mean': media,
+        'min': parte['min'],
+        'max': parte['max'],
+        'count': contagem,
+        'std': np.sqrt(variancia.clip(lower=0)),
+    }).reset_index()
+
+
+def combinar_regioes(cubo, regioes=None):
+    """
+    Junta as linhas do cubo de várias regiões em uma só.
+
+    Sem `regioes`, combina todas. O resultado é uma Series indexada por
+    (indicador, estatística), no mesmo formato de uma linha do cubo.
+    """
+    if regioes is not None:
+        cubo = cubo.loc[list(regioes)]
+    nivel = cubo.columns.get_level_values(1)
+    aditivas = cubo.loc[:, nivel.isin(['count', 'sum', 'sum_sq'])].sum()
+    minimos = cubo.loc[:, nivel == 'min'].min()
+    maximos = cubo.loc[:, nivel == 'max'].max()
+    return pd.concat([aditivas, minimos, maximos]).reindex(cubo.columns)
@@ -0,0 +1,94 @@
+"""
+Armazém de dados compartilhado pelas páginas do app multipágina
+
+O app multipágina (`app.py`) reúne a aplicação principal e os exemplos em um
+único processo Streamlit. Todas as páginas obtêm os dados pelo mesmo
+armazém, criado uma única vez por processo com `st.cache_resource`:
+
+    armazem = obter_armazem()
+    df_natal = armazem.dados()
+
+A fonte do armazém é o dataset registrado padrão (`dataset:natal`, ver
+`registro.py`), a mesma lida pela aplicação principal, e as páginas passam
+`armazem.fonte` às estruturas derivadas: há uma única cópia dos dados e de
+cada derivado no processo.
+
+Criar o armazém não carrega nada: cada fonte é lida pela primeira página
+que a pede, e cada estrutura derivada (cubo de agregados, índices
+ordenados, índices espacial, de busca e de chaves, tabela Arrow, resumos de
+quantis) é construída no primeiro uso. O custo é pago uma vez por processo,
+e não uma vez por página, e a aplicação principal, que só lê a região
+selecionada, não paga pela cidade inteira. `aquecer()` constrói tudo de
+antemão, para quem preferir pagar o custo na inicialização.
+
+O armazém não guarda cópias: os dados continuam no cache do processo de
+`carregamento.py`, com o mesmo TTL e a mesma invalidação. Por isso os
+scripts também funcionam isoladamente com `streamlit run`.
+"""
+
+import streamlit as st
+
+from .agregados import cubo_regioes
+from .busca import indice_busca
+from .cache_figuras import cache_figuras
+from .carregamento import (
+    carregar_colunas,
+    carregar_dados,
+    colunas_disponiveis,
+    invalidar_cache,
+    memoria_por_coluna,
+)
+from .colunar import tabela_arrow
+from .espacial import indice_espacial
+from .indices import indices_ordenados
+from .juncao import indice_chave
+from .quantis import resumos_regioes
+from .registro import DATASET_PADRAO, fonte_dataset
+
+
+class ArmazemDados:
+    """Acesso aos dados e às estruturas derivadas do processo."""
+
+    def __init__(self, fonte=None, aquecer=False):
+        # Fonte padrão das páginas; None usa o dataset registrado padrão
+        self.fonte = fonte_dataset(DATASET_PADRAO) if fonte is None else fonte
+        if aquecer:
+            self.aquecer()
+
+    def dados(self, fonte=None):
+        """DataFrame compartilhado da fonte (por padrão, a do armazém)."""
+        return carregar_dados(self.fonte if fonte is None else fonte)
+
+    def colunas_disponiveis(self, fonte=None):
+        """Nomes das colunas da fonte (por padrão, a do armazém), sem carregar os dados."""
+        return colunas_disponiveis(self.fonte if fonte is None else fonte)
+
+    def colunas(self, nomes, fonte=None):
+        """DataFrame só com as colunas pedidas, lidas sem as demais (ver `carregar_colunas`)."""
+        return carregar_colunas(nomes, self.fonte if fonte is None else fonte)
+
+    def aquecer(self, fonte=None):
+        """Carrega a fonte e constrói as estruturas derivadas usadas pelas páginas."""
+        fonte = self.fonte if fonte is None else fonte
+        self.dados(fonte)
+        cubo_regioes(fonte)
+        indices_ordenados(fonte)
+        indice_espacial(fonte)
+        indice_busca(fonte)
+        indice_chave('bairro', fonte)
+        tabela_arrow(fonte)
+        resumos_regioes(fonte)
+
+    def memoria(self, fonte=None):
+        return memoria_por_coluna(self.dados(fonte))
+
+    def invalidar(self):
+        """Descarta os dados, os derivados e as figuras em cache; a próxima leitura recarrega."""
+        invalidar_cache()
+        cache_figuras().limpar()
+
+
+@st.cache_resource(show_spinner=False)
+def obter_armazem():
+    """Armazém único do processo, compartilhado por todas as páginas e sessões."""
+    return ArmazemDados()
@@ -0,0 +1,118 @@
+"""
+Índice de busca textual para nomes de bairros
+
+Os nomes são normalizados uma única vez na carga dos dados: minúsculas, sem
+acentos e com `_` e pontuação trocados por espaço. Assim "Nazaré", "nazare"
+e "ns_nazare" passam a ser comparáveis sem renomear linhas à mão.
+
+Dois índices atendem as consultas:
+- Prefixo: palavras ordenadas, consultadas com `searchsorted` (consultas
+  curtas, com menos de três letras)
+- Trigramas: índice invertido trigrama -> nomes, com pontuação por
+  contagem via `np.bincount`, o que permite busca aproximada (fuzzy)
+
+Uso:
+
+    posicoes = indice_busca().buscar('nazare')
+    df_natal.iloc[posicoes]
+"""
+
+import numpy as np
+
+from .carregamento import obter_derivado
+from .texto import normalizar
+
+
+def trigramas(texto, bordas=True):
+    """Conjunto de trigramas do texto; com `bordas`, marca início e fim com espaço."""
+    if bordas:
+        texto = f' {texto} '
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceBusca:
+    """Índice de prefixo e de trigramas sobre uma sequência de nomes."""
+
+    def __init__(self, nomes):
+        self.nomes = [normalizar(nome) for nome in nomes]
+
+        # Índice de prefixo: todas as palavras, ordenadas, com o nome de origem
+        palavras = [(palavra, i) for i, nome in enumerate(self.nomes) for palavra in nome.split()]
+        palavras.sort()
+        self._palavras = np.array([p for p, _ in palavras], dtype=object)
+        self._donos_palavras = np.array([i for _, i in palavras], dtype=np.int64)
+
+        # Índice invertido de trigramas
+        listas = {}
+        for i, nome in enumerate(self.nomes):
+            for trigrama in trigramas(nome):
+                listas.setdefault(trigrama, []).append(i)
+        self._trigramas = {t: np.array(ids, dtype=np.int64) for t, ids in listas.items()}
+        self._tamanhos = np.array([len(nome) for nome in self.nomes], dtype=np.int64)
+        self._nomes_array = np.array(self.nomes, dtype=str)
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def _por_prefixo(self, consulta):
+        inicio = np.searchsorted(self._palavras, consulta, side='left')
+        fim = np.searchsorted(self._palavras, consulta + '\uffff', side='left')
+        donos = np.unique(self._donos_palavras[inicio:fim])
+        # Nomes mais curtos primeiro: são os casamentos mais específicos
+        return donos[np.argsort(self._tamanhos[donos], kind='stable')]
+
+    def pontuar(self, consulta, similaridade_minima=0.5, limite=None):
+        """
+        Retorna (posições, pontuações) dos nomes parecidos com a consulta.
+
+        Com `limite`, só os `limite` melhores são ordenados e retornados
+        (seleção parcial com `argpartition`). A pontuação é a fração dos trigramas da consulta presentes no nome,
+        de 0 a 1; nomes que contêm a consulta inteira recebem 1 mais um bônus,
+        maior quando o nome começa pela consulta.
+        """
+        consulta = normalizar(consulta)
+        if not consulta:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        if len(consulta) < 3:
+            posicoes = self._por_prefixo(consulta)[:limite]
+            return posicoes, np.ones(len(posicoes))
+
+        # Trigramas internos da consulta: todo nome que contém a consulta
+        # como substring contém todos eles
+        grams_consulta = trigramas(consulta, bordas=False)
+        grams = [self._trigramas[t] for t in grams_consulta if t in self._trigramas]
+        total = len(grams_consulta)
+        if not grams:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        contagem = np.bincount(np.concatenate(grams), minlength=len(self.nomes))
+        candidatos = np.flatnonzero(contagem >= similaridade_minima * total)
+        pontuacao = contagem[candidatos] / total
+
+        # Bônus para casamentos exatos, verificado só nos candidatos completos
+        completos = np.flatnonzero(pontuacao >= 1)
+        posicao = np.char.find(self._nomes_array[candidatos[completos]], consulta)
+        pontuacao[completos] += np.where(posicao == 0, 1.0, np.where(posicao > 0, 0.5, 0.0))
+
+        # Ordena por pontuação decrescente e, no empate, pelo nome mais curto
+        chave = -pontuacao * 1e6 + self._tamanhos[candidatos]
+        if limite is not None and len(candidatos) > limite:
+            melhores = np.argpartition(chave, limite - 1)[:limite]
+            candidatos, pontuacao, chave = candidatos[melhores], pontuacao[melhores], chave[melhores]
+        ordem = np.argsort(chave, kind='stable')
+        return candidatos[ordem], pontuacao[ordem]
+
+    def buscar(self, consulta, limite=50, similaridade_minima=0.5):
+        """Posições dos nomes mais parecidos com a consulta, em ordem de relevância."""
+        posicoes, _ = self.pontuar(consulta, similaridade_minima, limite)
+        return posicoes
+
+
+def construir_indice_busca(df, coluna='bairro'):
+    return IndiceBusca(df[coluna].tolist())
+
+
+def indice_busca(fonte=None):
+    """Retorna o índice de busca dos bairros, construído uma vez por carga."""
+    return obter_derivado('indice_busca', construir_indice_busca, fonte)
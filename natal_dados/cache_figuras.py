@@ -0,0 +1,159 @@
+"""
+Cache de figuras Plotly com remoção LRU por orçamento de bytes
+
+As figuras do dashboard dependem apenas do estado dos filtros (indicador,
+região, limiares). Este cache guarda a figura pronta, indexada por esse
+estado normalizado, para que uma nova execução do script com as mesmas
+entradas (por exemplo, quando o usuário mexe em um widget não relacionado)
+não precise construir a figura de novo.
+
+O tamanho de cada entrada é estimado pela memória dos vetores e textos da
+figura (`estimar_bytes`), sem serializá-la: a serialização já é feita uma
+vez pelo `st.plotly_chart`. As entradas usadas há mais tempo são removidas
+quando o total passa do orçamento. Contadores de acertos, falhas e remoções
+ficam disponíveis em `estatisticas()` e aparecem no painel e no log do modo
+de perfil (`perfil.py`).
+
+Há um único cache por processo (`st.cache_resource`), compartilhado por
+todas as sessões e páginas, e o orçamento limita a memória do processo
+inteiro. A fonte dos dados faz parte do estado de cada figura, então
+seleções de fontes diferentes não se confundem.
+
+Uso:
+
+    figuras = cache_figuras()
+    fig = figuras.obter(
+        chave_figura('barras', fonte=fonte, indicador=coluna, regiao=regiao),
+        lambda: construir_barras(df_filtrado, coluna)
+    )
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import streamlit as st
+
+# Orçamento padrão do cache, em bytes (estimados por `estimar_bytes`)
+LIMITE_BYTES_PADRAO = int(os.environ.get('NATAL_FIGURAS_BYTES', 64 * 1024 * 1024))
+
+
+def _normalizar(valor):
+    if isinstance(valor, float):
+        return round(valor, 6)
+    if isinstance(valor, (list, tuple)):
+        return tuple(_normalizar(v) for v in valor)
+    if isinstance(valor, (set, frozenset)):
+        return tuple(sorted(_normalizar(v) for v in valor))
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _normalizar(v)) for k, v in valor.items()))
+    if hasattr(valor, 'item'):
+        # Escalares do NumPy viram tipos nativos do Python
+        return _normalizar(valor.item())
+    return valor
+
+
+# Custo aproximado de um valor escalar (número, booleano, None) e de cada
+# entrada de dicionário ou lista
+BYTES_ESCALAR = 16
+
+
+def estimar_bytes(valor):
+    """
+    Memória aproximada de um valor da figura: bytes dos vetores NumPy e dos
+    textos, mais um custo fixo por escalar e por item de dicionário ou lista.
+    Vetores de objetos contam o custo fixo por elemento, sem percorrê-los.
+    """
+    if isinstance(valor, np.ndarray):
+        if valor.dtype == object:
+            return valor.size * BYTES_ESCALAR
+        return valor.nbytes
+    if isinstance(valor, str):
+        return len(valor)
+    if isinstance(valor, dict):
+        return sum(BYTES_ESCALAR + estimar_bytes(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)):
+        return sum(BYTES_ESCALAR + estimar_bytes(v) for v in valor)
+    return BYTES_ESCALAR
+
+
+def chave_figura(nome, **estado):
+    """
+    Monta a chave de uma figura a partir do seu nome e do estado dos filtros.
+
+    A ordem dos argumentos não importa, floats são arredondados e listas ou
+    conjuntos viram tuplas, de modo que estados equivalentes geram a mesma chave.
+    """
+    return (nome, _normalizar(estado))
+
+
+class CacheFiguras:
+    """Cache LRU de figuras, limitado pela memória estimada das entradas."""
+
+    def __init__(self, limite_bytes=LIMITE_BYTES_PADRAO):
+        self.limite_bytes = limite_bytes
+        self._entradas = OrderedDict()  # chave -> (figura, bytes)
+        self._trava = threading.Lock()
+        self.bytes_total = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+
+    def obter(self, chave, construir):
+        """Retorna a figura da chave, chamando `construir()` só em caso de falha."""
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return entrada[0]
+            self.falhas += 1
+
+        figura = construir()
+        tamanho = estimar_bytes(figura.to_plotly_json())
+
+        with self._trava:
+            if chave not in self._entradas and tamanho <= self.limite_bytes:
+                self._entradas[chave] = (figura, tamanho)
+                self.bytes_total += tamanho
+                self._remover_excedente()
+        return figura
+
+    def _remover_excedente(self):
+        while self.bytes_total > self.limite_bytes and self._entradas:
+            _, (_, tamanho) = self._entradas.popitem(last=False)
+            self.bytes_total -= tamanho
+            self.remocoes += 1
+
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
+            self.bytes_total = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def estatisticas(self):
+        """Contadores do cache, para exibição ou log."""
+        consultas = self.acertos + self.falhas
+        return {
+            'entradas': len(self._entradas),
+            'bytes': self.bytes_total,
+            'limite_bytes': self.limite_bytes,
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'remocoes': self.remocoes,
+            'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+        }
+
+
+@st.cache_resource(show_spinner=False)
+def cache_figuras():
+    """
+    Cache de figuras único do processo, limitado por LIMITE_BYTES_PADRAO.
+
+    As figuras não dependem da carga dos dados, só da chave; `limpar()`
+    descarta todas (o armazém faz isso ao invalidar os dados).
+    """
+    return CacheFiguras()
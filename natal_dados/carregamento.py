@@ -0,0 +1,293 @@
+"""
+Carregamento compartilhado dos dados dos bairros de Natal/RN
+
+Este módulo substitui as cópias de `carregar_dados()` que existiam em cada
+script. Ele oferece:
+- Fontes plugáveis: URL remota, arquivo CSV local ou snapshot Arrow já limpo
+- Um único cache por processo, com TTL explícito e invalidação; a leitura
+  de uma fonte e a construção de um derivado não bloqueiam as consultas às
+  demais entradas do cache
+- Esquema compacto: textos como categorias (ou strings Arrow, quando quase
+  todos os valores são distintos), inteiros no menor tipo possível
+  e coordenadas em float32 quando a precisão permite
+- Estruturas derivadas (agregados, índices) calculadas uma vez por carga e
+  guardadas no mesmo cache
+- Leitura só das colunas pedidas (`carregar_colunas`): `usecols` no CSV e
+  seleção de colunas no snapshot, com cache por conjunto de colunas
+- Seleção da fonte pela variável de ambiente NATAL_DADOS_FONTE, o que permite
+  rodar tudo offline apontando para um arquivo local
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .correcoes import CORRECOES_NATAL, aplicar_correcoes
+from .snapshot import CAMINHO_SNAPSHOT, carregar_snapshot, esquema_snapshot
+
+# URL original do dataset
+URL_DADOS = 'https://raw.githubusercontent.com/igendriz/DCA3501-Ciencia-Dados/main/Dataset/Bairros_Natal_v01.csv'
+
+# Extensões reconhecidas como snapshot Arrow IPC
+EXTENSOES_SNAPSHOT = ('.arrow', '.feather')
+
+# Prefixo das fontes que apontam para um dataset registrado (ver registro.py)
+PREFIXO_DATASET = 'dataset:'
+
+# Colunas de texto guardadas como categorias
+COLUNAS_CATEGORICAS = ['regiao', 'bairro']
+
+# Acima desta fração de valores distintos, uma categoria gasta mais memória
+# do que economiza; a coluna vira string Arrow
+MAX_FRACAO_DISTINTOS = 0.5
+
+# Colunas float convertidas para float32 e o maior erro absoluto aceito na
+# conversão, em metros. Renda e rendimento ficam em float64: em float32,
+# valores como 918.83 aparecem nas tabelas como 918.830017
+TOLERANCIA_FLOAT32 = {
+    'x': 1.0,
+    'y': 1.0,
+}
+
+# Tempo de vida padrão das entradas do cache, em segundos
+TTL_PADRAO = float(os.environ.get('NATAL_DADOS_TTL', 3600))
+
+# Cache do processo: chave da fonte -> (instante do carregamento, DataFrame)
+_cache = {}
+# Estruturas derivadas: (chave da fonte, nome) -> (DataFrame de origem, valor)
+_derivados = {}
+# Leituras parciais: (chave da fonte, colunas ordenadas) -> (instante do carregamento, DataFrame)
+_projecoes = {}
+# Nomes das colunas: chave da fonte -> (instante da leitura, lista de nomes)
+_esquemas = {}
+# A trava global protege só os dicionários e é solta antes de qualquer leitura
+# ou construção; cada entrada tem a sua própria trava, para que duas threads
+# que pedem a mesma fonte (ou o mesmo derivado) não façam o trabalho duas vezes
+_trava = threading.RLock()
+_travas_entradas = {}
+
+
+def _trava_entrada(chave):
+    with _trava:
+        return _travas_entradas.setdefault(chave, threading.RLock())
+
+
+def resolver_fonte(fonte=None):
+    """
+    Converte a descrição de uma fonte em uma tupla (tipo, local).
+
+    Os tipos possíveis são 'url', 'arquivo' (CSV bruto, que passa pela limpeza),
+    'snapshot' (Arrow IPC já limpo, lido via mmap) e 'dataset' (partições de
+    um dataset registrado, no formato 'dataset:natal' ou
+    'dataset:natal/norte,sul'). Sem fonte explícita,
+    usa NATAL_DADOS_FONTE; se ela não estiver definida, usa o snapshot local
+    quando existir e, por último, a URL original.
+    """
+    if fonte is None:
+        fonte = os.environ.get('NATAL_DADOS_FONTE')
+    if fonte is None:
+        if CAMINHO_SNAPSHOT.exists():
+            return ('snapshot', str(CAMINHO_SNAPSHOT))
+        return ('url', URL_DADOS)
+
+    fonte = str(fonte)
+    if fonte.startswith(PREFIXO_DATASET):
+        return ('dataset', fonte[len(PREFIXO_DATASET):])
+    if fonte.startswith(('http://', 'https://')):
+        return ('url', fonte)
+    caminho = Path(fonte).expanduser().resolve()
+    if caminho.suffix in EXTENSOES_SNAPSHOT:
+        return ('snapshot', str(caminho))
+    return ('arquivo', str(caminho))
+
+
+def limpar_dados(df, correcoes=CORRECOES_NATAL):
+    """Aplica a limpeza usada em todos os exemplos ao DataFrame bruto."""
+    # Remove linhas com quaisquer valores ausentes (NaN)
+    df = df.dropna()
+
+    # Corrige nomes específicos de bairros para padronização (sem acentos ou
+    # espaços), pela tabela de correções do dataset
+    df = aplicar_correcoes(df, correcoes)
+
+    # Remove a coluna 'Unnamed: 0', gerada automaticamente pelo salvamento anterior do CSV
+    if 'Unnamed: 0' in df.columns:
+        df = df.drop(columns='Unnamed: 0')
+
+    return df
+
+
+def compactar_tipos(df):
+    """
+    Converte o DataFrame para um esquema compacto.
+
+    - `regiao` e `bairro` viram categorias, o que acelera groupbys e filtros
+      de igualdade (comparação de códigos inteiros); se quase todos os valores
+      forem distintos (nomes de setores, por exemplo), viram string Arrow
+    - `populacao` usa o menor tipo inteiro que comporta os valores
+    - Coordenadas vão para float32 quando o erro de arredondamento fica
+      dentro de TOLERANCIA_FLOAT32; renda e rendimento continuam em float64
+    """
+    # Cópia rasa: colunas que já estão no tipo certo (por exemplo, as lidas
+    # via mmap do snapshot) continuam compartilhando a mesma memória
+    df = df.copy(deep=False)
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns and not isinstance(df[coluna].dtype, (pd.CategoricalDtype, pd.StringDtype)):
+            distintos = df[coluna].nunique(dropna=False)
+            if distintos <= MAX_FRACAO_DISTINTOS * len(df) or distintos <= 64:
+                df[coluna] = df[coluna].astype('category')
+            else:
+                df[coluna] = df[coluna].astype('string[pyarrow]')
+
+    if 'populacao' in df.columns:
+        populacao = df['populacao']
+        if pd.api.types.is_float_dtype(populacao) and (populacao % 1 == 0).all():
+            populacao = populacao.astype('int64')
+        df['populacao'] = pd.to_numeric(populacao, downcast='integer')
+
+    for coluna, tolerancia in TOLERANCIA_FLOAT32.items():
+        if coluna in df.columns and df[coluna].dtype == np.float64:
+            valores = df[coluna].to_numpy()
+            reduzido = valores.astype(np.float32)
+            if np.nanmax(np.abs(reduzido.astype(np.float64) - valores), initial=0.0) <= tolerancia:
+                df[coluna] = reduzido
+
+    return df
+
+
+def memoria_por_coluna(df):
+    """Memória ocupada por coluna (incluindo o conteúdo dos textos), em bytes."""
+    memoria = df.memory_usage(deep=True, index=False)
+    return pd.DataFrame({
+        'tipo': df.dtypes.astype(str),
+        'bytes': memoria,
+    }).rename_axis('coluna')
+
+
+def _ler_fonte(tipo, local, colunas=None):
+    if tipo == 'dataset':
+        from .registro import carregar_particoes
+        return carregar_particoes(local, colunas)
+    if tipo == 'snapshot':
+        return compactar_tipos(carregar_snapshot(local, colunas=colunas))
+    return compactar_tipos(limpar_dados(pd.read_csv(local, usecols=colunas)))
+
+
+def _obter_em_cache(tipo, entradas, chave, ler, ttl):
+    # Consulta `entradas` e, se preciso, chama `ler()` sob a trava da entrada
+    # (tipo, chave)
+    def valida():
+        with _trava:
+            entrada = entradas.get(chave)
+        if entrada is not None and time.monotonic() - entrada[0] < ttl:
+            return entrada[1]
+        return None
+
+    valor = valida()
+    if valor is not None:
+        return valor
+    with _trava_entrada((tipo, chave)):
+        # Outra thread pode ter lido a fonte enquanto esta esperava
+        valor = valida()
+        if valor is None:
+            valor = ler()
+            with _trava:
+                entradas[chave] = (time.monotonic(), valor)
+        return valor
+
+
+def carregar_dados(fonte=None, ttl=TTL_PADRAO):
+    """
+    Retorna o DataFrame limpo dos bairros, usando o cache do processo.
+
+    A mesma fonte só é lida de novo depois de `ttl` segundos ou de uma chamada
+    a `invalidar_cache`. O DataFrame retornado é compartilhado entre todos os
+    scripts do processo e não deve ser modificado no lugar.
+    """
+    chave = resolver_fonte(fonte)
+    return _obter_em_cache('dados', _cache, chave, lambda: _ler_fonte(*chave), ttl)
+
+
+def obter_derivado(nome, construir, fonte=None, ttl=TTL_PADRAO):
+    """
+    Retorna uma estrutura derivada do DataFrame carregado, como um agregado
+    ou um índice.
+
+    `construir(df)` só é chamado na primeira vez para cada carga dos dados; o
+    resultado fica no cache do processo e é descartado junto com o DataFrame
+    quando o TTL expira ou o cache é invalidado.
+    """
+    df = carregar_dados(fonte, ttl)
+    chave = (resolver_fonte(fonte), nome)
+
+    def valido():
+        with _trava:
+            entrada = _derivados.get(chave)
+        return entrada if entrada is not None and entrada[0] is df else None
+
+    entrada = valido()
+    if entrada is not None:
+        return entrada[1]
+    with _trava_entrada(('derivado', chave)):
+        entrada = valido()
+        if entrada is not None:
+            return entrada[1]
+        valor = construir(df)
+        with _trava:
+            _derivados[chave] = (df, valor)
+        return valor
+
+
+def _ler_nomes(tipo, local):
+    if tipo == 'dataset':
+        from .registro import colunas_particoes
+        return colunas_particoes(local)
+    if tipo == 'snapshot':
+        return esquema_snapshot(local).names
+    # Do CSV, só o cabeçalho
+    return [coluna for coluna in pd.read_csv(local, nrows=0).columns if coluna != 'Unnamed: 0']
+
+
+def colunas_disponiveis(fonte=None, ttl=TTL_PADRAO):
+    """Nomes das colunas da fonte, lidos do esquema do snapshot ou do cabeçalho do CSV."""
+    chave = resolver_fonte(fonte)
+    return list(_obter_em_cache('esquema', _esquemas, chave, lambda: _ler_nomes(*chave), ttl))
+
+
+def carregar_colunas(colunas, fonte=None, ttl=TTL_PADRAO):
+    """
+    DataFrame limpo só com as colunas pedidas, na ordem pedida.
+
+    Só essas colunas são lidas da fonte: `usecols` no CSV e seleção de
+    colunas no snapshot (as páginas das demais não saem do disco). Cada
+    conjunto de colunas fica no cache do processo, com o mesmo TTL de
+    `carregar_dados`. Como a limpeza só olha as colunas lidas, linhas com
+    valores ausentes apenas em outras colunas são mantidas.
+    """
+    colunas = list(colunas)
+    selecao = tuple(sorted(set(colunas)))
+    chave = (resolver_fonte(fonte), selecao)
+    df = _obter_em_cache('colunas', _projecoes, chave, lambda: _ler_fonte(*chave[0], list(selecao)), ttl)
+    return pd.DataFrame({coluna: df[coluna] for coluna in colunas}, copy=False)
+
+
+def invalidar_cache(fonte=None):
+    """Descarta o cache de uma fonte específica ou, sem argumento, de todas."""
+    with _trava:
+        if fonte is None:
+            _cache.clear()
+            _derivados.clear()
+            _projecoes.clear()
+            _esquemas.clear()
+        else:
+            chave = resolver_fonte(fonte)
+            _cache.pop(chave, None)
+            _esquemas.pop(chave, None)
+            for chave_projecao in [c for c in _projecoes if c[0] == chave]:
+                del _projecoes[chave_projecao]
+            for chave_derivado in [c for c in _derivados if c[0] == chave]:
+                del _derivados[chave_derivado]
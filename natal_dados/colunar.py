@@ -0,0 +1,155 @@
+"""
+Camada colunar: o dataset como `pyarrow.Table` e filtros com kernels Arrow
+
+`st.dataframe`, `st.download_button` e o Plotly Express aceitam tabelas
+Arrow diretamente. Quando os filtros produzem DataFrames do pandas, cada
+rerun paga uma cópia do resultado filtrado e, em seguida, a conversão dessa
+cópia para Arrow na serialização. Aqui os dados ficam em Arrow do começo ao
+fim:
+- a tabela é construída uma vez por carga a partir do DataFrame em cache;
+  as colunas numéricas são convertidas sem cópia
+- os filtros de região e de intervalo são kernels de `pyarrow.compute`,
+  com uma máscara em cache por filtro, como em `filtros.py`
+- o resultado é uma `pyarrow.Table` que vai direto para a tabela, os
+  gráficos e a exportação em CSV (`pyarrow.csv`), sem passar pelo pandas
+
+Uso em um script Streamlit:
+
+    filtro = obter_filtro_arrow(st.session_state, tabela_arrow())
+    filtro.igual('regiao', 'regiao', regiao_ou_none)
+    filtro.intervalo('populacao', 'populacao', pop_min, pop_max)
+    tabela_filtrada = filtro.linhas()
+"""
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+
+from .carregamento import obter_derivado
+
+
+def construir_tabela_arrow(df):
+    """
+    Converte o DataFrame limpo em `pyarrow.Table`.
+
+    Categorias viram colunas de dicionário. Os metadados do pandas são
+    descartados: a tabela não tem índice e pode ser fatiada e projetada à
+    vontade sem que eles fiquem inconsistentes.
+    """
+    return pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+
+
+def tabela_arrow(fonte=None):
+    """Tabela Arrow do dataset carregado, construída uma vez por carga."""
+    return obter_derivado('tabela_arrow', construir_tabela_arrow, fonte)
+
+
+class FiltroArrow:
+    """Predicados nomeados sobre uma `pyarrow.Table`, com máscaras em cache."""
+
+    def __init__(self, tabela):
+        self.tabela = tabela
+        # nome -> assinatura do predicado, por exemplo ('igual', 'regiao', 'sul')
+        self._predicados = {}
+        # nome -> (assinatura, máscara booleana Arrow)
+        self._mascaras = {}
+        # (estado dos predicados, tabela filtrada)
+        self._combinacao = None
+        # (tabela filtrada, conteúdo CSV)
+        self._csv = None
+        self.recalculos = 0
+
+    def igual(self, nome, coluna, valor):
+        """Seleciona as linhas em que `coluna == valor`. Com valor None, remove o filtro."""
+        if valor is None:
+            return self.remover(nome)
+        self._predicados[nome] = ('igual', coluna, valor)
+        return self
+
+    def intervalo(self, nome, coluna, minimo, maximo):
+        """Seleciona as linhas com `minimo <= coluna <= maximo` (limites inclusivos)."""
+        self._predicados[nome] = ('intervalo', coluna, minimo, maximo)
+        return self
+
+    def remover(self, nome):
+        """Remove um predicado, mantendo a máscara em cache caso ele volte."""
+        self._predicados.pop(nome, None)
+        return self
+
+    def _calcular_mascara(self, assinatura):
+        tipo, coluna, *parametros = assinatura
+        valores = self.tabela.column(coluna)
+        if tipo == 'igual':
+            return pc.equal(valores, parametros[0])
+        minimo, maximo = parametros
+        return pc.and_(pc.greater_equal(valores, minimo), pc.less_equal(valores, maximo))
+
+    def mascara(self, nome):
+        """Retorna a máscara de um predicado, recalculando só se ele mudou."""
+        assinatura = self._predicados[nome]
+        entrada = self._mascaras.get(nome)
+        if entrada is not None and entrada[0] == assinatura:
+            return entrada[1]
+        mascara = self._calcular_mascara(assinatura)
+        self._mascaras[nome] = (assinatura, mascara)
+        self.recalculos += 1
+        return mascara
+
+    def linhas(self):
+        """
+        Tabela filtrada, guardada até os predicados mudarem.
+
+        Sem nenhum filtro, retorna a própria tabela, sem cópia.
+        """
+        estado = tuple(sorted(self._predicados.items()))
+        if self._combinacao is not None and self._combinacao[0] == estado:
+            return self._combinacao[1]
+
+        if not estado:
+            tabela = self.tabela
+        else:
+            nomes = [nome for nome, _ in estado]
+            combinada = self.mascara(nomes[0])
+            for nome in nomes[1:]:
+                combinada = pc.and_(combinada, self.mascara(nome))
+            # Valores ausentes na máscara (NaN/nulos) descartam a linha
+            tabela = self.tabela.filter(combinada, null_selection_behavior='drop')
+
+        self._combinacao = (estado, tabela)
+        return tabela
+
+    def csv(self):
+        """CSV da tabela filtrada, gerado de novo só quando os filtros mudam."""
+        tabela = self.linhas()
+        if self._csv is None or self._csv[0] is not tabela:
+            self._csv = (tabela, exportar_csv(tabela))
+        return self._csv[1]
+
+    def __len__(self):
+        return self.linhas().num_rows
+
+
+def obter_filtro_arrow(estado, tabela, chave='filtro_arrow'):
+    """
+    Recupera o motor de filtros Arrow guardado em `estado` (ex.: st.session_state).
+
+    Um novo motor é criado quando ainda não existe ou quando a tabela foi
+    reconstruída, para que máscaras antigas nunca sejam aplicadas a dados novos.
+    """
+    filtro = estado.get(chave)
+    if filtro is None or filtro.tabela is not tabela:
+        filtro = FiltroArrow(tabela)
+        estado[chave] = filtro
+    return filtro
+
+
+def exportar_csv(tabela):
+    """Conteúdo CSV (bytes) da tabela, escrito pelo pyarrow sem passar pelo pandas."""
+    # Colunas de dicionário são gravadas pelos seus valores
+    colunas = [
+        pc.cast(coluna, coluna.type.value_type) if pa.types.is_dictionary(coluna.type) else coluna
+        for coluna in tabela.columns
+    ]
+    destino = pa.BufferOutputStream()
+    pa_csv.write_csv(pa.table(colunas, names=tabela.column_names), destino)
+    return destino.getvalue().to_pybytes()
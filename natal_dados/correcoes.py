@@ -0,0 +1,53 @@
+"""
+Tabelas de correção de nomes de bairros
+
+As correções são declaradas por dataset e indexadas pelo nome original
+normalizado (ver `texto.normalizar`), e não pela posição da linha no CSV.
+Assim continuam valendo se o arquivo de origem for reordenado, filtrado ou
+ganhar novas linhas.
+"""
+
+import warnings
+
+from .texto import normalizar
+
+# Nomes padronizados (sem acentos ou espaços) para os bairros de Natal/RN
+CORRECOES_NATAL = {
+    'nossa senhora da apresentacao': 'ns_apresentacao',
+    'nossa senhora de nazare': 'ns_nazare',
+    'cidade da esperanca': 'c_esperanca',
+}
+
+
+def aplicar_correcoes(df, correcoes, coluna='bairro'):
+    """
+    Substitui os nomes da coluna conforme a tabela de correções.
+
+    Só os valores distintos são normalizados, então o custo não depende do
+    número de linhas. Correções que não casam com nenhum nome geram um aviso,
+    para que mudanças no arquivo de origem não passem despercebidas.
+    """
+    if not correcoes or coluna not in df.columns:
+        return df
+
+    nomes = df[coluna].dropna().unique()
+    substituicoes = {}
+    for nome in nomes:
+        corrigido = correcoes.get(normalizar(nome))
+        if corrigido is not None and corrigido != nome:
+            substituicoes[nome] = corrigido
+
+    usadas = {normalizar(nome) for nome in substituicoes} | {
+        normalizar(nome) for nome in nomes if nome in correcoes.values()
+    }
+    nao_usadas = [chave for chave in correcoes if chave not in usadas]
+    if nao_usadas:
+        warnings.warn(
+            f'Correções sem bairro correspondente: {", ".join(nao_usadas)}',
+            stacklevel=2
+        )
+
+    if substituicoes:
+        df = df.copy()
+        df[coluna] = df[coluna].replace(substituicoes)
+    return df
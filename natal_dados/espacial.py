@@ -0,0 +1,136 @@
+"""
+Índice espacial em grade para consultas por área e por proximidade
+
+As coordenadas x/y (em metros) são distribuídas em uma grade regular, com
+cerca de `PONTOS_POR_CELULA` pontos por célula. As posições das linhas ficam
+ordenadas pela célula, e um vetor de deslocamentos (como em uma matriz
+esparsa CSR) indica onde começa cada célula. Como as células de uma mesma
+linha da grade são consecutivas, um retângulo vira uma fatia por linha da
+grade, sem percorrer os demais pontos.
+
+Consultas:
+- `retangulo`: pontos dentro de uma área, por exemplo a área visível do mapa
+- `raio`: pontos a até uma distância de um ponto ("bairros a até 2 km")
+- `vizinhos`: os k pontos mais próximos, ampliando o raio até ter k pontos
+
+O índice é construído uma vez por carga dos dados:
+
+    indice = indice_espacial()
+    posicoes, distancias = indice.raio(x, y, 2000)
+    df_natal.iloc[posicoes]
+"""
+
+import numpy as np
+
+from .carregamento import obter_derivado
+
+# Ocupação média desejada das células da grade
+PONTOS_POR_CELULA = 8
+
+
+class IndiceEspacial:
+    """Grade regular sobre as coordenadas, com as posições agrupadas por célula."""
+
+    def __init__(self, x, y, pontos_por_celula=PONTOS_POR_CELULA):
+        self.x = np.asarray(x, dtype='float64')
+        self.y = np.asarray(y, dtype='float64')
+        n = len(self.x)
+
+        if n:
+            self.x_min, self.x_max = self.x.min(), self.x.max()
+            self.y_min, self.y_max = self.y.min(), self.y.max()
+        else:
+            self.x_min = self.x_max = self.y_min = self.y_max = 0.0
+        largura = self.x_max - self.x_min
+        altura = self.y_max - self.y_min
+
+        # Lado da célula para que a grade tenha cerca de n / pontos_por_celula células
+        celulas = max(n / pontos_por_celula, 1.0)
+        if largura > 0 and altura > 0:
+            self.lado = np.sqrt(largura * altura / celulas)
+        else:
+            self.lado = max(largura, altura) / celulas or 1.0
+        self.colunas = int(largura // self.lado) + 1
+        self.linhas = int(altura // self.lado) + 1
+
+        celula = self._linha(self.y) * self.colunas + self._coluna(self.x)
+        self.ordem = np.argsort(celula, kind='stable')
+        contagem = np.bincount(celula, minlength=self.colunas * self.linhas)
+        self.inicio = np.concatenate([[0], np.cumsum(contagem)])
+
+    def __len__(self):
+        return len(self.x)
+
+    def _coluna(self, x):
+        coluna = np.floor((np.asarray(x, dtype='float64') - self.x_min) / self.lado)
+        return np.clip(coluna, 0, self.colunas - 1).astype(np.int64)
+
+    def _linha(self, y):
+        linha = np.floor((np.asarray(y, dtype='float64') - self.y_min) / self.lado)
+        return np.clip(linha, 0, self.linhas - 1).astype(np.int64)
+
+    def _candidatos(self, x_min, x_max, y_min, y_max):
+        """Posições dos pontos nas células que cruzam o retângulo."""
+        if (not len(self) or x_min > self.x_max or x_max < self.x_min
+                or y_min > self.y_max or y_max < self.y_min):
+            return np.empty(0, dtype=np.int64)
+
+        c0, c1 = self._coluna(x_min), self._coluna(x_max)
+        l0, l1 = self._linha(y_min), self._linha(y_max)
+        fatias = []
+        for linha in range(l0, l1 + 1):
+            primeira = linha * self.colunas + c0
+            ultima = linha * self.colunas + c1
+            fatias.append(self.ordem[self.inicio[primeira]:self.inicio[ultima + 1]])
+        return np.concatenate(fatias)
+
+    def retangulo(self, x_min, x_max, y_min, y_max):
+        """Posições (em ordem crescente) dos pontos dentro do retângulo, bordas incluídas."""
+        posicoes = self._candidatos(x_min, x_max, y_min, y_max)
+        x, y = self.x[posicoes], self.y[posicoes]
+        dentro = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+        return np.sort(posicoes[dentro])
+
+    def raio(self, x, y, distancia):
+        """
+        Pontos a até `distancia` de (x, y).
+
+        Retorna (posicoes, distancias), em ordem crescente de distância.
+        """
+        posicoes = self._candidatos(x - distancia, x + distancia, y - distancia, y + distancia)
+        distancias = np.hypot(self.x[posicoes] - x, self.y[posicoes] - y)
+        dentro = distancias <= distancia
+        posicoes, distancias = posicoes[dentro], distancias[dentro]
+        ordem = np.argsort(distancias, kind='stable')
+        return posicoes[ordem], distancias[ordem]
+
+    def vizinhos(self, x, y, k):
+        """
+        Os `k` pontos mais próximos de (x, y), como (posicoes, distancias).
+
+        Começa com um raio de uma célula e o dobra até encontrar k pontos:
+        todos os pontos a até esse raio são examinados, então os k primeiros
+        são de fato os mais próximos.
+        """
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        # Distância até o canto mais distante da grade: com ela, todos os pontos entram
+        alcance = np.hypot(max(abs(x - self.x_min), abs(x - self.x_max)),
+                           max(abs(y - self.y_min), abs(y - self.y_max)))
+        distancia = self.lado
+        while True:
+            posicoes, distancias = self.raio(x, y, distancia)
+            if len(posicoes) >= k or distancia >= alcance:
+                return posicoes[:k], distancias[:k]
+            distancia *= 2
+
+
+def construir_indice_espacial(df):
+    return IndiceEspacial(df['x'].to_numpy(), df['y'].to_numpy())
+
+
+def indice_espacial(fonte=None):
+    """Retorna o índice espacial do dataset carregado, construído uma vez por carga."""
+    return obter_derivado('indice_espacial', construir_indice_espacial, fonte)
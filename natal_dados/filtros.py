@@ -0,0 +1,135 @@
+"""
+Motor de filtros incremental
+
+Cada filtro (predicado) tem um nome e guarda a sua própria máscara booleana.
+Quando um widget muda, apenas a máscara daquele predicado é recalculada; as
+demais são reaproveitadas e combinadas com operações bit a bit.
+
+Filtros de intervalo sobre colunas com índice ordenado (ver `indices.py`)
+usam busca binária em vez de comparar a coluna inteira.
+
+O resultado é um array de posições das linhas selecionadas. O DataFrame
+filtrado só é materializado quando precisa ser exibido, e sem nenhum filtro
+ativo o próprio DataFrame original é devolvido, sem cópia.
+
+Uso típico em um script Streamlit:
+
+    filtro = obter_filtro(st.session_state, df_natal, indices_ordenados())
+    filtro.igual('regiao', 'regiao', regiao_ou_none)
+    filtro.intervalo('populacao', 'populacao', pop_min, pop_max)
+    df_filtrado = filtro.linhas()
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class FiltroIncremental:
+    """Conjunto de predicados nomeados sobre um DataFrame, com máscaras em cache."""
+
+    def __init__(self, df, indices=None):
+        self.df = df
+        # coluna -> IndiceOrdenado, usado pelos filtros de intervalo
+        self.indices_colunas = indices or {}
+        # nome -> assinatura do predicado, por exemplo ('igual', 'regiao', 'sul')
+        self._predicados = {}
+        # nome -> (assinatura, máscara booleana)
+        self._mascaras = {}
+        # (estado dos predicados, posições selecionadas)
+        self._combinacao = None
+        # Quantas máscaras foram de fato calculadas (útil para diagnóstico)
+        self.recalculos = 0
+
+    def igual(self, nome, coluna, valor):
+        """Seleciona as linhas em que `coluna == valor`. Com valor None, remove o filtro."""
+        if valor is None:
+            return self.remover(nome)
+        self._predicados[nome] = ('igual', coluna, valor)
+        return self
+
+    def intervalo(self, nome, coluna, minimo, maximo):
+        """Seleciona as linhas com `minimo <= coluna <= maximo` (limites inclusivos)."""
+        self._predicados[nome] = ('intervalo', coluna, minimo, maximo)
+        return self
+
+    def remover(self, nome):
+        """Remove um predicado, mantendo a máscara em cache caso ele volte."""
+        self._predicados.pop(nome, None)
+        return self
+
+    def _calcular_mascara(self, assinatura):
+        tipo, coluna, *parametros = assinatura
+        if tipo == 'intervalo' and coluna in self.indices_colunas:
+            return self.indices_colunas[coluna].mascara(*parametros)
+        serie = self.df[coluna]
+        if tipo == 'igual':
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                # Compara os códigos inteiros da categoria, não os textos
+                categorias = serie.cat.categories
+                if parametros[0] not in categorias:
+                    return np.zeros(len(serie), dtype=bool)
+                return serie.cat.codes.to_numpy() == categorias.get_loc(parametros[0])
+            return serie.to_numpy() == parametros[0]
+        valores = serie.to_numpy()
+        minimo, maximo = parametros
+        return (valores >= minimo) & (valores <= maximo)
+
+    def mascara(self, nome):
+        """Retorna a máscara de um predicado, recalculando só se ele mudou."""
+        assinatura = self._predicados[nome]
+        entrada = self._mascaras.get(nome)
+        if entrada is not None and entrada[0] == assinatura:
+            return entrada[1]
+        mascara = self._calcular_mascara(assinatura)
+        self._mascaras[nome] = (assinatura, mascara)
+        self.recalculos += 1
+        return mascara
+
+    def indices(self):
+        """Posições (para uso com `iloc`) das linhas que passam em todos os filtros."""
+        estado = tuple(sorted(self._predicados.items()))
+        if self._combinacao is not None and self._combinacao[0] == estado:
+            return self._combinacao[1]
+
+        if not estado:
+            posicoes = np.arange(len(self.df))
+        else:
+            nomes = [nome for nome, _ in estado]
+            combinada = self.mascara(nomes[0]).copy()
+            for nome in nomes[1:]:
+                np.logical_and(combinada, self.mascara(nome), out=combinada)
+            posicoes = np.flatnonzero(combinada)
+
+        self._combinacao = (estado, posicoes)
+        return posicoes
+
+    def linhas(self):
+        """
+        Materializa o DataFrame filtrado para exibição.
+
+        Se nenhum filtro remove linhas, retorna o DataFrame original sem cópia.
+        """
+        posicoes = self.indices()
+        if len(posicoes) == len(self.df):
+            return self.df
+        return self.df.iloc[posicoes]
+
+    def __len__(self):
+        return len(self.indices())
+
+
+def obter_filtro(estado, df, indices=None, chave='filtro_incremental'):
+    """
+    Recupera o motor de filtros guardado em `estado` (ex.: st.session_state).
+
+    `indices` é um dicionário coluna -> IndiceOrdenado construído sobre o
+    mesmo DataFrame.
+
+    Um novo motor é criado quando ainda não existe ou quando o DataFrame foi
+    recarregado, para que máscaras antigas nunca sejam aplicadas a dados novos.
+    """
+    filtro = estado.get(chave)
+    if filtro is None or filtro.df is not df:
+        filtro = FiltroIncremental(df, indices)
+        estado[chave] = filtro
+    return filtro
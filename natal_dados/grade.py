@@ -0,0 +1,117 @@
+"""
+Agregação espacial em grade (células quadradas ou hexagonais)
+
+Quando há pontos demais para o gráfico por bairro ficar legível, os pontos
+são agrupados em células de tamanho fixo e cada célula recebe um valor
+agregado do indicador. Tudo é feito em uma passada com `np.bincount`:
+- cada ponto recebe o número da sua célula (aritmética de ponto flutuante)
+- somas de peso e de peso * valor por célula saem de `np.bincount`
+- a média ponderada é a razão entre as duas somas
+
+Para a renda, o peso é a população: a célula mostra a renda média dos
+moradores, e não a média simples dos setores. Para a população, a célula
+mostra a soma.
+
+Nas células hexagonais, os centros formam uma rede triangular, que é a
+união de duas redes retangulares deslocadas. O centro mais próximo em cada
+uma sai de um arredondamento, e o ponto fica com o mais próximo dos dois.
+"""
+
+import numpy as np
+import pandas as pd
+
+FORMAS = ('quadrada', 'hexagonal')
+
+ESTATISTICAS = ('media', 'soma')
+
+# Tamanho padrão da célula, em metros (lado do quadrado ou distância entre
+# centros de hexágonos vizinhos)
+TAMANHO_PADRAO = 1000.0
+
+
+def _celulas_quadradas(x, y, tamanho, x0, y0):
+    coluna = np.floor((x - x0) / tamanho).astype(np.int64)
+    linha = np.floor((y - y0) / tamanho).astype(np.int64)
+    return coluna, linha, x0 + (coluna + 0.5) * tamanho, y0 + (linha + 0.5) * tamanho
+
+
+def _celulas_hexagonais(x, y, tamanho, x0, y0):
+    # Rede A: centros em (i * dx, j * dy); rede B: deslocada de meia célula
+    dx, dy = tamanho, tamanho * np.sqrt(3)
+    u, v = (x - x0) / dx, (y - y0) / dy
+
+    ia, ja = np.round(u), np.round(v)
+    ib, jb = np.floor(u), np.floor(v)
+    dist_a = (u - ia) ** 2 + 3 * (v - ja) ** 2
+    dist_b = (u - ib - 0.5) ** 2 + 3 * (v - jb - 0.5) ** 2
+    rede_b = dist_b < dist_a
+
+    # Coluna e linha na rede triangular: a rede B ocupa as posições ímpares
+    coluna = np.where(rede_b, 2 * ib + 1, 2 * ia).astype(np.int64)
+    linha = np.where(rede_b, 2 * jb + 1, 2 * ja).astype(np.int64)
+    return coluna, linha, x0 + coluna * dx / 2, y0 + linha * dy / 2
+
+
+def agregar_em_grade(x, y, valores, pesos=None, tamanho=TAMANHO_PADRAO,
+                     forma='quadrada', estatistica='media'):
+    """
+    Agrega os pontos em células e retorna uma linha por célula ocupada.
+
+    Colunas: coluna, linha (posição inteira da célula na grade), x, y (centro
+    da célula, na unidade das coordenadas), contagem, peso e valor. Com
+    `estatistica='media'`, o valor é a média dos valores ponderada por
+    `pesos` (sem pesos, a média simples); com 'soma', é a soma dos valores.
+    Pontos com coordenada, valor ou peso ausente são ignorados.
+    """
+    if forma not in FORMAS:
+        raise ValueError(f'forma deve ser uma de {FORMAS}: {forma!r}')
+    if estatistica not in ESTATISTICAS:
+        raise ValueError(f'estatistica deve ser uma de {ESTATISTICAS}: {estatistica!r}')
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    valores = np.asarray(valores, dtype='float64')
+    pesos = np.ones_like(valores) if pesos is None else np.asarray(pesos, dtype='float64')
+
+    validos = np.isfinite(x) & np.isfinite(y) & np.isfinite(valores) & np.isfinite(pesos)
+    x, y, valores, pesos = x[validos], y[validos], valores[validos], pesos[validos]
+    if not len(x):
+        return pd.DataFrame(columns=['coluna', 'linha', 'x', 'y', 'contagem', 'peso', 'valor'])
+
+    x0, y0 = x.min(), y.min()
+    if forma == 'quadrada':
+        coluna, linha, centro_x, centro_y = _celulas_quadradas(x, y, tamanho, x0, y0)
+    else:
+        coluna, linha, centro_x, centro_y = _celulas_hexagonais(x, y, tamanho, x0, y0)
+
+    # Número da célula em uma grade densa (as colunas começam em 0 ou -1)
+    coluna_min = coluna.min()
+    largura = coluna.max() - coluna_min + 1
+    linha_min = linha.min()
+    celula = (linha - linha_min) * largura + (coluna - coluna_min)
+
+    contagem = np.bincount(celula)
+    ocupadas = np.flatnonzero(contagem)
+    peso = np.bincount(celula, weights=pesos)[ocupadas]
+    soma = np.bincount(celula, weights=pesos * valores if estatistica == 'media' else valores)[ocupadas]
+
+    # Centro de cada célula ocupada, tirado do primeiro ponto que caiu nela
+    primeiro = np.full(len(contagem), -1, dtype=np.int64)
+    primeiro[celula[::-1]] = np.arange(len(celula))[::-1]
+    primeiro = primeiro[ocupadas]
+
+    if estatistica == 'media':
+        with np.errstate(invalid='ignore', divide='ignore'):
+            valor = np.where(peso > 0, soma / peso, np.nan)
+    else:
+        valor = soma
+
+    return pd.DataFrame({
+        'coluna': coluna[primeiro],
+        'linha': linha[primeiro],
+        'x': centro_x[primeiro],
+        'y': centro_y[primeiro],
+        'contagem': contagem[ocupadas],
+        'peso': peso,
+        'valor': valor,
+    })
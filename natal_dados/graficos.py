@@ -0,0 +1,341 @@
+"""
+Construção das figuras Plotly compartilhadas pelos scripts
+
+Cada figura é montada por inteiro em uma função, sem ajustes posteriores no
+script, para que possa ser guardada no cache de figuras (`cache_figuras.py`).
+
+A visualização espacial usa um único traço `Scattergl` (WebGL) com a cor
+definida pela região, em vez de um `go.Scatter` por região com rótulo em
+todos os pontos. O tamanho do que é enviado ao navegador fica limitado:
+- Acima de `limite_pontos`, os pontos são decimados por grade: o plano é
+  dividido em células e cada célula ocupada mantém um único representante
+- Apenas os `rotulos_top` maiores valores do indicador recebem rótulo
+- Coordenadas vão em float32, em quilômetros
+
+Com pontos demais para o gráfico por bairro, `figura_grade` mostra a
+agregação em células (`grade.py`) como um único traço: um `Heatmap` para
+células quadradas ou um `Scattergl` de hexágonos para células hexagonais.
+
+O tamanho dos marcadores vem de uma única escala para qualquer indicador
+(área proporcional ao valor, ver `escalar_tamanhos`), e o texto do hover é
+montado a partir de um único array `customdata` para todos os pontos.
+
+O gráfico de barras por bairro pode mostrar apenas os N maiores e os N
+menores valores, com os demais reunidos em uma barra "Outros". A seleção usa
+`nlargest`/`nsmallest` (O(n log N)) em vez de ordenar o conjunto inteiro.
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# Dicionário com cores atribuídas para cada região
+CORES_REGIAO = {
+    'norte': 'blue',
+    'sul': 'green',
+    'leste': 'orange',
+    'oeste': 'red'
+}
+
+COR_PADRAO = 'gray'
+
+# Quantidade máxima de pontos enviada ao navegador no gráfico espacial
+LIMITE_PONTOS = 5000
+
+# Quantidade de pontos com rótulo de texto
+ROTULOS_TOP = 40
+
+# Quantidade padrão de maiores e de menores bairros no gráfico de barras
+BARRAS_TOP_N = 20
+
+# Faixa de diâmetros dos marcadores, em pixels
+TAMANHO_MIN = 4
+TAMANHO_MAX = 30
+
+# Percentil usado como teto da escala de tamanhos, para que poucos valores
+# extremos não encolham todos os outros marcadores
+PERCENTIL_TETO = 99
+
+
+def escalar_tamanhos(valores, tamanho_min=TAMANHO_MIN, tamanho_max=TAMANHO_MAX,
+                     percentil_teto=PERCENTIL_TETO):
+    """
+    Converte os valores de qualquer indicador em diâmetros de marcador (pixels).
+
+    A área do marcador é proporcional ao valor: o diâmetro cresce com a raiz
+    de valor / teto, onde o teto é o percentil `percentil_teto` dos valores.
+    Valores acima do teto ficam com `tamanho_max`; valores negativos ou
+    ausentes ficam com `tamanho_min`.
+    """
+    valores = np.asarray(valores, dtype='float64')
+    finitos = np.isfinite(valores)
+    if not finitos.any():
+        return np.full(valores.shape, tamanho_min, dtype=np.float32)
+
+    teto = np.percentile(valores[finitos], percentil_teto)
+    if teto <= 0:
+        return np.full(valores.shape, tamanho_min, dtype=np.float32)
+
+    fracao = np.clip(np.where(finitos, valores, 0.0) / teto, 0.0, 1.0)
+    return (tamanho_min + (tamanho_max - tamanho_min) * np.sqrt(fracao)).astype(np.float32)
+
+
+def formato_hover(valores):
+    """Formato d3 do valor no hover: inteiros com separador de milhar, demais com 2 casas."""
+    if np.issubdtype(np.asarray(valores).dtype, np.integer):
+        return ',.0f'
+    return ',.2f'
+
+
+def decimar_por_grade(x, y, limite):
+    """
+    Seleciona no máximo `limite` pontos distribuídos pelo plano.
+
+    O retângulo que envolve os pontos é dividido em uma grade de cerca de
+    `limite` células, e cada célula ocupada mantém o seu primeiro ponto.
+    Retorna as posições escolhidas, em ordem crescente.
+    """
+    n = len(x)
+    if n <= limite:
+        return np.arange(n)
+
+    lado = max(int(np.sqrt(limite)), 1)
+    x_min, x_max = x.min(), x.max()
+    y_min, y_max = y.min(), y.max()
+    coluna = ((x - x_min) / ((x_max - x_min) or 1) * (lado - 1)).astype(np.int64)
+    linha = ((y - y_min) / ((y_max - y_min) or 1) * (lado - 1)).astype(np.int64)
+    _, posicoes = np.unique(linha * lado + coluna, return_index=True)
+    return np.sort(posicoes)[:limite]
+
+
+def figura_espacial(df, coluna, nome_indicador, titulo=None,
+                    limite_pontos=LIMITE_PONTOS, rotulos_top=ROTULOS_TOP, altura=600):
+    """
+    Figura da distribuição espacial dos bairros, com um único traço WebGL.
+
+    `df` precisa das colunas bairro, regiao, x, y e da coluna do indicador.
+    """
+    total = len(df)
+    x = df['x'].to_numpy(dtype='float64') / 1e3   # Coordenada X convertida para quilômetros
+    y = df['y'].to_numpy(dtype='float64') / 1e3   # Coordenada Y convertida para quilômetros
+
+    posicoes = decimar_por_grade(x, y, limite_pontos)
+    x, y = x[posicoes], y[posicoes]
+    valores = df[coluna].to_numpy()[posicoes]
+    regioes = df['regiao'].to_numpy()[posicoes].astype(str)
+    bairros = df['bairro'].to_numpy()[posicoes].astype(str)
+    cores = np.array([CORES_REGIAO.get(regiao, COR_PADRAO) for regiao in regioes])
+
+    # Dados do hover de todos os pontos em um único array (bairro, região, valor);
+    # o valor continua numérico para ser formatado pelo próprio Plotly
+    customdata = np.empty((len(posicoes), 3), dtype=object)
+    customdata[:, 0] = bairros
+    customdata[:, 1] = np.char.capitalize(regioes)
+    customdata[:, 2] = valores.tolist()
+
+    fig = go.Figure()
+    fig.add_trace(go.Scattergl(
+        x=x.astype(np.float32),
+        y=y.astype(np.float32),
+        mode='markers',
+        marker=dict(
+            size=escalar_tamanhos(valores),
+            color=cores,
+            opacity=0.8,
+            line=dict(width=1, color='black')
+        ),
+        customdata=customdata,
+        hovertemplate=(
+            "<b>%{customdata[0]}</b><br>" +
+            "Região: %{customdata[1]}<br>" +
+            f"{nome_indicador}: %{{customdata[2]:{formato_hover(valores)}}}<br>" +
+            "Coordenada X: %{x:.2f} km<br>" +
+            "Coordenada Y: %{y:.2f} km<extra></extra>"
+        ),
+        showlegend=False
+    ))
+
+    # Rótulos de texto apenas para os maiores valores do indicador
+    if rotulos_top and len(valores):
+        k = min(rotulos_top, len(valores))
+        top = np.argpartition(-valores, k - 1)[:k]
+        fig.add_trace(go.Scattergl(
+            x=x[top].astype(np.float32),
+            y=y[top].astype(np.float32),
+            mode='text',
+            text=bairros[top],
+            textposition="top center",
+            hoverinfo='skip',
+            showlegend=False
+        ))
+
+    # Entradas de legenda por região, sem pontos
+    for regiao in sorted(set(regioes)):
+        fig.add_trace(go.Scattergl(
+            x=[None], y=[None],
+            mode='markers',
+            marker=dict(size=10, color=CORES_REGIAO.get(regiao, COR_PADRAO)),
+            name=regiao.capitalize()
+        ))
+
+    if titulo is None:
+        titulo = f"Distribuição Espacial por {nome_indicador}"
+    if len(posicoes) < total:
+        titulo += f" ({len(posicoes)} de {total} pontos)"
+
+    fig.update_layout(
+        title=titulo,
+        xaxis_title="Coordenada X (km)",
+        yaxis_title="Coordenada Y (km)",
+        legend_title="Região",
+        height=altura,
+        hovermode='closest'
+    )
+    return fig
+
+
+def figura_grade(celulas, nome_indicador, tamanho, forma='quadrada', titulo=None, altura=600):
+    """
+    Mapa de calor das células de `grade.agregar_em_grade`, em um único traço.
+
+    `tamanho` é o tamanho da célula usado na agregação (mesma unidade das
+    coordenadas, metros). Nas células hexagonais, o tamanho do marcador em
+    pixels é estimado a partir da altura da figura, com os eixos na mesma
+    escala; com zoom, os hexágonos deixam de se encostar.
+    """
+    if titulo is None:
+        titulo = f"{nome_indicador} por Célula ({tamanho / 1e3:g} km)"
+    escala_cores = dict(colorscale='Viridis', colorbar=dict(title=nome_indicador))
+    hover = (
+        "Coordenada X: %{x:.2f} km<br>" +
+        "Coordenada Y: %{y:.2f} km<br>" +
+        f"{nome_indicador}: %{{z:,.2f}}<br>" +
+        "Bairros: %{customdata}<extra></extra>"
+    )
+
+    fig = go.Figure()
+    if len(celulas) and forma == 'quadrada':
+        # Grade densa: cada célula vai para a sua posição (linha, coluna)
+        colunas = celulas['coluna'].to_numpy()
+        linhas = celulas['linha'].to_numpy()
+        c0, l0 = colunas.min(), linhas.min()
+        forma_grade = (linhas.max() - l0 + 1, colunas.max() - c0 + 1)
+        z = np.full(forma_grade, np.nan)
+        z[linhas - l0, colunas - c0] = celulas['valor'].to_numpy()
+        contagem = np.zeros(forma_grade, dtype=np.int64)
+        contagem[linhas - l0, colunas - c0] = celulas['contagem'].to_numpy()
+
+        # Origem da grade, a partir do centro de uma célula qualquer
+        x0 = celulas['x'].iloc[0] - (colunas[0] + 0.5) * tamanho
+        y0 = celulas['y'].iloc[0] - (linhas[0] + 0.5) * tamanho
+        eixo_x = x0 + (np.arange(c0, c0 + forma_grade[1]) + 0.5) * tamanho
+        eixo_y = y0 + (np.arange(l0, l0 + forma_grade[0]) + 0.5) * tamanho
+
+        fig.add_trace(go.Heatmap(
+            x=(eixo_x / 1e3).astype(np.float32),
+            y=(eixo_y / 1e3).astype(np.float32),
+            z=z.astype(np.float32),
+            customdata=contagem,
+            hovertemplate=hover,
+            hoverongaps=False,
+            **escala_cores
+        ))
+    elif len(celulas):
+        y = celulas['y'].to_numpy()
+        extensao = max(y.max() - y.min(), tamanho)
+        # Área útil do gráfico estimada em 75% da altura da figura
+        tamanho_px = float(np.clip(altura * 0.75 * tamanho / extensao, 3, 60))
+        fig.add_trace(go.Scattergl(
+            x=(celulas['x'].to_numpy() / 1e3).astype(np.float32),
+            y=(y / 1e3).astype(np.float32),
+            mode='markers',
+            marker=dict(
+                symbol='hexagon',
+                size=tamanho_px,
+                color=celulas['valor'].to_numpy().astype(np.float32),
+                line=dict(width=0),
+                showscale=True,
+                **escala_cores
+            ),
+            customdata=celulas['contagem'].to_numpy(),
+            hovertemplate=hover.replace('%{z:', '%{marker.color:'),
+            showlegend=False
+        ))
+
+    fig.update_layout(
+        title=titulo,
+        xaxis_title="Coordenada X (km)",
+        yaxis_title="Coordenada Y (km)",
+        yaxis=dict(scaleanchor='x', scaleratio=1),
+        height=altura
+    )
+    return fig
+
+
+def dados_ranking(df, coluna, top_n=None):
+    """
+    Prepara os dados do ranking de bairros por um indicador.
+
+    Sem `top_n`, ou quando há no máximo 2 * top_n linhas, retorna o DataFrame
+    inteiro em ordem decrescente. Caso contrário, retorna os `top_n` maiores,
+    uma linha "Outros" com a média dos demais e os `top_n` menores.
+    """
+    if top_n is None or len(df) <= 2 * top_n:
+        return df.sort_values(by=coluna, ascending=False)
+
+    maiores = df.nlargest(top_n, coluna)
+    # Com empates no corte, os menores não podem repetir linhas dos maiores
+    sem_maiores = df[~df.index.isin(maiores.index)]
+    menores = sem_maiores.nsmallest(top_n, coluna).iloc[::-1]
+    # A média dos demais ignora os bairros sem valor, como `mean()`
+    restantes = sem_maiores.loc[~sem_maiores.index.isin(menores.index), coluna].dropna()
+
+    outros = pd.DataFrame({
+        'bairro': [f'Outros ({len(restantes)} bairros, média)'],
+        'regiao': ['outros'],
+        coluna: [restantes.mean()],
+    })
+    colunas = ['bairro', 'regiao', coluna]
+    return pd.concat([maiores[colunas], outros, menores[colunas]], ignore_index=True)
+
+
+def figura_barras(df, coluna, nome_indicador, altura=600, top_n=None):
+    """
+    Gráfico de barras do indicador por bairro, em ordem decrescente.
+
+    Com `top_n`, mostra só os extremos e agrega o meio (ver `dados_ranking`).
+    """
+    dados = dados_ranking(df, coluna, top_n)
+    fig = px.bar(
+        dados,
+        x="bairro",
+        y=coluna,
+        color="regiao",
+        color_discrete_map={'outros': COR_PADRAO},
+        title=f"{nome_indicador} por Bairro",
+        labels={"bairro": "Bairro", coluna: nome_indicador},
+        height=altura
+    )
+
+    # Ajustar layout, mantendo a ordem do ranking no eixo X
+    fig.update_layout(
+        xaxis_tickangle=-45,
+        xaxis_title="Bairro",
+        yaxis_title=nome_indicador,
+        xaxis=dict(categoryorder='array', categoryarray=dados['bairro'].tolist())
+    )
+    return fig
+
+
+def figura_comparacao(stats_regiao, nome_indicador):
+    """Gráfico de barras com a média do indicador por região."""
+    return px.bar(
+        stats_regiao,
+        x='Região',
+        y='Média',
+        color='Região',
+        title=f"Média de {nome_indicador} por Região",
+        labels={"Média": f"Média de {nome_indicador}"},
+        text_auto=True
+    )
@@ -0,0 +1,68 @@
+"""
+Índices ordenados por coluna para consultas de intervalo
+
+Para cada coluna numérica, o índice guarda a permutação que ordena os valores
+e os valores já ordenados. Uma consulta `[minimo, maximo]` vira duas buscas
+binárias (`searchsorted`) e uma fatia, em O(log n + k), em vez de comparar a
+coluna inteira a cada movimento do slider.
+
+Os índices são construídos uma vez por carga dos dados:
+
+    indices = indices_ordenados()
+    posicoes = indices['populacao'].posicoes(10000, 30000)
+    df_natal.iloc[posicoes]
+"""
+
+import numpy as np
+
+from .agregados import INDICADORES
+from .carregamento import obter_derivado
+
+
+class IndiceOrdenado:
+    """Índice de uma coluna: posições das linhas em ordem crescente de valor."""
+
+    def __init__(self, valores):
+        valores = np.asarray(valores)
+        self.ordem = np.argsort(valores, kind='stable')
+        self.valores_ordenados = valores[self.ordem]
+
+    def __len__(self):
+        return len(self.ordem)
+
+    def _limites(self, minimo, maximo):
+        inicio = np.searchsorted(self.valores_ordenados, minimo, side='left')
+        fim = np.searchsorted(self.valores_ordenados, maximo, side='right')
+        return inicio, max(inicio, fim)
+
+    def contar(self, minimo, maximo):
+        """Quantidade de linhas com `minimo <= valor <= maximo`, em O(log n)."""
+        inicio, fim = self._limites(minimo, maximo)
+        return int(fim - inicio)
+
+    def posicoes(self, minimo, maximo, ordenar=True):
+        """
+        Posições das linhas com `minimo <= valor <= maximo`.
+
+        Com `ordenar=True` as posições voltam na ordem original das linhas;
+        com `ordenar=False` voltam em ordem crescente de valor, sem custo extra.
+        """
+        inicio, fim = self._limites(minimo, maximo)
+        posicoes = self.ordem[inicio:fim]
+        return np.sort(posicoes) if ordenar else posicoes
+
+    def mascara(self, minimo, maximo):
+        """Máscara booleana equivalente à consulta de intervalo."""
+        mascara = np.zeros(len(self.ordem), dtype=bool)
+        mascara[self.posicoes(minimo, maximo, ordenar=False)] = True
+        return mascara
+
+
+def construir_indices(df, colunas=INDICADORES):
+    """Constrói um IndiceOrdenado para cada coluna informada."""
+    return {coluna: IndiceOrdenado(df[coluna].to_numpy()) for coluna in colunas}
+
+
+def indices_ordenados(fonte=None):
+    """Retorna os índices do dataset carregado, construídos uma vez por carga."""
+    return obter_derivado('indices_ordenados', construir_indices, fonte)
@@ -0,0 +1,169 @@
+"""
+Junção de arquivos enviados com o dataset de bairros por um índice de chaves
+
+A coluna-chave do dataset (por padrão, `bairro`) ganha um índice hash,
+construído uma vez por carga: chave normalizada (`texto.normalizar`) ->
+posição da linha. Assim "Nazaré", "nazare" e "NAZARE" encontram a mesma
+linha. Os nomes originais da tabela de correções do dataset também entram
+no índice, apontando para a linha do nome corrigido: um arquivo com os
+nomes do IBGE ("Nossa Senhora de Nazaré") encontra a linha "ns_nazare".
+
+A junção é feita bloco a bloco, junto com a leitura em blocos do upload
+(`upload.ler_csv_em_blocos`):
+- as chaves de cada bloco são fatoradas (`pd.factorize`) e só os valores
+  distintos são normalizados e procurados no índice, em tempo linear
+- os valores das colunas numéricas são escritos direto em vetores do
+  tamanho do dataset, alinhados às suas linhas; o arquivo enviado não fica
+  inteiro em memória e o DataFrame base não é copiado
+- chaves sem correspondência são contadas e reportadas
+
+Se uma chave aparece mais de uma vez no arquivo, vale a última ocorrência,
+e as repetições são contadas.
+
+Uso:
+
+    juncao = JuncaoIncremental(indice_chave('bairro'), 'nome_do_bairro', df_natal.columns)
+    for bloco, resumo in ler_csv_em_blocos(arquivo):
+        juncao.atualizar(bloco)
+    novas = juncao.colunas_juntadas(df_natal.index)
+"""
+
+import numpy as np
+import pandas as pd
+
+from .carregamento import obter_derivado
+from .registro import correcoes_da_fonte
+from .texto import normalizar
+
+
+class IndiceChave:
+    """Índice hash de uma coluna-chave: chave normalizada -> posição da linha."""
+
+    def __init__(self, valores, correcoes=None):
+        codigos, unicos = pd.factorize(pd.Series(valores))
+        validas = np.flatnonzero(codigos >= 0)
+        # Primeira posição de cada valor distinto (na atribuição, vale a última
+        # escrita, por isso as posições vão em ordem inversa)
+        primeira = np.empty(len(unicos), dtype=np.int64)
+        primeira[codigos[validas[::-1]]] = validas[::-1]
+
+        self._mapa = {}
+        for valor, posicao in zip(unicos, primeira):
+            self._mapa.setdefault(normalizar(valor), int(posicao))
+        # Linhas cuja chave normalizada já pertencia a uma linha anterior
+        self.duplicadas = len(validas) - len(self._mapa)
+
+        # Nomes originais da tabela de correções (nome original normalizado ->
+        # nome corrigido) levam à linha do nome corrigido
+        for original, corrigido in (correcoes or {}).items():
+            posicao = self._mapa.get(normalizar(corrigido))
+            if posicao is not None:
+                self._mapa.setdefault(normalizar(original), posicao)
+        self.tamanho = len(codigos)
+
+    def __len__(self):
+        return len(self._mapa)
+
+    def posicoes(self, chaves):
+        """Posição no dataset de cada chave (-1 quando não há correspondência)."""
+        codigos, unicos = pd.factorize(pd.Series(chaves))
+        posicao_unico = np.fromiter(
+            (self._mapa.get(normalizar(valor), -1) for valor in unicos),
+            dtype=np.int64, count=len(unicos)
+        )
+        # Chaves ausentes (NaN) têm código -1 e ficam sem correspondência
+        return np.where(codigos >= 0, posicao_unico[codigos], -1)
+
+
+def indice_chave(coluna='bairro', fonte=None):
+    """
+    Índice da coluna-chave do dataset carregado, construído uma vez por carga.
+
+    Para a coluna `bairro`, os nomes originais da tabela de correções da
+    fonte também são aceitos como chave.
+    """
+    correcoes = correcoes_da_fonte(fonte) if coluna == 'bairro' else None
+    return obter_derivado(
+        f'indice_chave:{coluna}', lambda df: IndiceChave(df[coluna].astype(str), correcoes), fonte
+    )
+
+
+class JuncaoIncremental:
+    """Acumula, bloco a bloco, as colunas numéricas do upload alinhadas ao dataset."""
+
+    def __init__(self, indice, chave, colunas_base=(), sufixo='_upload'):
+        self.indice = indice
+        # Coluna-chave no arquivo enviado
+        self.chave = chave
+        self._colunas_base = set(colunas_base)
+        self.sufixo = sufixo
+
+        self._valores = {}  # nome da coluna -> vetor do tamanho do dataset
+        self._preenchidas = np.zeros(indice.tamanho, dtype=bool)
+        self._nao_encontradas = {}  # chave original -> linhas
+        self.ignoradas = []
+        self.linhas = 0
+        self.casadas = 0
+        self.repetidas = 0
+
+    def _nome(self, coluna):
+        # Colunas com o mesmo nome de uma coluna do dataset recebem um sufixo
+        return f'{coluna}{self.sufixo}' if coluna in self._colunas_base else coluna
+
+    def atualizar(self, bloco):
+        if self.chave not in bloco.columns:
+            raise KeyError(f'coluna-chave ausente no arquivo: {self.chave!r}')
+
+        posicoes = self.indice.posicoes(bloco[self.chave])
+        casadas = posicoes >= 0
+        destino = posicoes[casadas]
+
+        self.linhas += len(bloco)
+        self.casadas += int(casadas.sum())
+        # Repetições: ocorrências repetidas dentro do bloco, mais uma por chave
+        # distinta do bloco que já tinha sido vista em blocos anteriores
+        distintas = np.unique(destino)
+        self.repetidas += len(destino) - len(distintas)
+        self.repetidas += int(self._preenchidas[distintas].sum())
+        self._preenchidas[destino] = True
+
+        for coluna in bloco.columns:
+            if coluna == self.chave:
+                continue
+            if not pd.api.types.is_numeric_dtype(bloco[coluna]) or pd.api.types.is_bool_dtype(bloco[coluna]):
+                if coluna not in self.ignoradas:
+                    self.ignoradas.append(coluna)
+                continue
+            nome = self._nome(coluna)
+            if nome not in self._valores:
+                self._valores[nome] = np.full(self.indice.tamanho, np.nan)
+            valores = bloco[coluna].to_numpy(dtype='float64', na_value=np.nan)
+            self._valores[nome][destino] = valores[casadas]
+
+        if not casadas.all():
+            faltando = bloco[self.chave][~casadas].value_counts(dropna=False)
+            for chave, linhas in faltando.items():
+                self._nao_encontradas[chave] = self._nao_encontradas.get(chave, 0) + int(linhas)
+
+    def colunas_juntadas(self, indice_base=None):
+        """DataFrame com as colunas juntadas, uma linha por linha do dataset (NaN sem correspondência)."""
+        return pd.DataFrame(self._valores, index=indice_base, copy=False)
+
+    def nao_encontradas(self):
+        """Chaves do arquivo sem correspondência no dataset, com o número de linhas de cada uma."""
+        tabela = pd.DataFrame(
+            list(self._nao_encontradas.items()), columns=[self.chave, 'linhas']
+        )
+        return tabela.sort_values('linhas', ascending=False, ignore_index=True)
+
+    def resumo(self):
+        return {
+            'linhas': self.linhas,
+            'casadas': self.casadas,
+            'nao_encontradas': self.linhas - self.casadas,
+            'chaves_nao_encontradas': len(self._nao_encontradas),
+            'repetidas': self.repetidas,
+            'bairros_preenchidos': int(self._preenchidas.sum()),
+            'colunas': list(self._valores),
+            'ignoradas': list(self.ignoradas),
+        }
@@ -0,0 +1,164 @@
+"""
+Medição de tempo e memória por etapa de uma execução do script
+
+Modo opcional, ligado pela variável de ambiente `NATAL_PERFIL=1` ou pelo
+parâmetro de URL `?perfil=1`. O parâmetro de URL só é aceito quando
+`NATAL_PERFIL_PERMITIR_URL=1`: sem isso, qualquer visitante poderia ligar o
+`tracemalloc` do processo inteiro. Cada etapa do pipeline (carregar, filtrar,
+agregar, construir figuras, serializar com `st.plotly_chart`) é envolvida
+por `perfil.etapa(nome)`, que registra:
+- duração (ms), com `time.perf_counter`
+- memória alocada ao final da etapa e pico durante a etapa (KiB), com
+  `tracemalloc`
+
+Ao final da execução, `perfil.tabela()` alimenta o painel da sidebar e
+`perfil.registrar(...)` grava uma linha JSON por execução no logger
+`natal_dados.perfil` (stderr, ou o arquivo em `NATAL_PERFIL_ARQUIVO`).
+
+Com o modo desligado, `etapa` não mede nada e o custo é o de um
+gerenciador de contexto vazio. O `tracemalloc` é global ao processo:
+alocações feitas ao mesmo tempo por outras sessões ou pelo
+pré-carregamento entram na conta da etapa em andamento. O `tracemalloc` é
+ligado pelo primeiro perfil ativo e desligado quando o último deles é
+registrado (ou descartado); se ele já estava ligado por outro motivo, fica
+como estava.
+
+Uso:
+
+    perfil = Perfil(perfil_ativo(st.query_params))
+    with perfil.etapa('carregar_dados'):
+        df = carregar_dados()
+    ...
+    perfil.registrar(script='streamlit_app.py')
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+
+import pandas as pd
+
+VARIAVEL_AMBIENTE = 'NATAL_PERFIL'
+VARIAVEL_PERMITIR_URL = 'NATAL_PERFIL_PERMITIR_URL'
+PARAMETRO_URL = 'perfil'
+
+_logger = logging.getLogger('natal_dados.perfil')
+
+
+def perfil_ativo(parametros=None):
+    """
+    Indica se o modo de perfil está ligado pelo ambiente ou pelos parâmetros de URL.
+
+    Os parâmetros de URL só são consultados com NATAL_PERFIL_PERMITIR_URL ligada.
+    """
+    if os.environ.get(VARIAVEL_AMBIENTE, '0') not in ('', '0'):
+        return True
+    if parametros is not None and os.environ.get(VARIAVEL_PERMITIR_URL, '0') not in ('', '0'):
+        return parametros.get(PARAMETRO_URL, '0') not in ('', '0')
+    return False
+
+
+# Perfis ativos que usam o tracemalloc e se foi este módulo que o ligou
+_trava_tracemalloc = threading.Lock()
+_perfis_tracemalloc = 0
+_tracemalloc_iniciado = False
+
+
+def _reservar_tracemalloc():
+    global _perfis_tracemalloc, _tracemalloc_iniciado
+    with _trava_tracemalloc:
+        if _perfis_tracemalloc == 0:
+            _tracemalloc_iniciado = not tracemalloc.is_tracing()
+            if _tracemalloc_iniciado:
+                tracemalloc.start()
+        _perfis_tracemalloc += 1
+
+
+def _liberar_tracemalloc():
+    global _perfis_tracemalloc
+    with _trava_tracemalloc:
+        _perfis_tracemalloc -= 1
+        if _perfis_tracemalloc == 0 and _tracemalloc_iniciado:
+            tracemalloc.stop()
+
+
+def _configurar_logger():
+    # Uma linha JSON crua por registro, sem prefixos, para facilitar a coleta
+    if _logger.handlers:
+        return
+    arquivo = os.environ.get('NATAL_PERFIL_ARQUIVO')
+    manipulador = logging.FileHandler(arquivo) if arquivo else logging.StreamHandler(sys.stderr)
+    manipulador.setFormatter(logging.Formatter('%(message)s'))
+    _logger.addHandler(manipulador)
+    _logger.setLevel(logging.INFO)
+    _logger.propagate = False
+
+
+class Perfil:
+    """Tempos e alocações das etapas de uma execução."""
+
+    def __init__(self, ativo=True):
+        self.ativo = ativo
+        self.etapas = []
+        self._inicio = time.perf_counter()
+        self._liberar = None
+        if ativo:
+            _reservar_tracemalloc()
+            # Libera o tracemalloc em `registrar` ou, se a execução for
+            # interrompida antes, quando o perfil for descartado
+            self._liberar = weakref.finalize(self, _liberar_tracemalloc)
+
+    @contextmanager
+    def etapa(self, nome):
+        if not self.ativo:
+            yield
+            return
+
+        tracemalloc.reset_peak()
+        memoria_inicial, _ = tracemalloc.get_traced_memory()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            duracao = time.perf_counter() - inicio
+            memoria_final, pico = tracemalloc.get_traced_memory()
+            self.etapas.append({
+                'etapa': nome,
+                'ms': round(duracao * 1e3, 3),
+                'alocado_kib': round((memoria_final - memoria_inicial) / 1024, 1),
+                'pico_kib': round((pico - memoria_inicial) / 1024, 1),
+            })
+
+    def total_ms(self):
+        return round((time.perf_counter() - self._inicio) * 1e3, 3)
+
+    def tabela(self):
+        """Uma linha por etapa, na ordem de execução."""
+        return pd.DataFrame(self.etapas, columns=['etapa', 'ms', 'alocado_kib', 'pico_kib'])
+
+    def registrar(self, **contexto):
+        """Grava a execução como uma linha JSON; `contexto` entra no registro (script, filtros...)."""
+        if not self.ativo:
+            return None
+        _configurar_logger()
+        registro = {
+            'evento': 'perfil',
+            'timestamp': time.time(),
+            **contexto,
+            'total_ms': self.total_ms(),
+            'etapas': self.etapas,
+        }
+        linha = json.dumps(registro, ensure_ascii=False, default=str)
+        _logger.info(linha)
+        self._liberar()
+        return linha
+
+
+# Instância desligada, usada como padrão em funções que aceitam um perfil
+PERFIL_DESLIGADO = Perfil(ativo=False)
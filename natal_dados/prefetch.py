@@ -0,0 +1,150 @@
+"""
+Pré-carregamento em segundo plano das próximas seleções prováveis
+
+Depois de cada renderização, o script agenda tarefas que calculam, em um
+pool de threads, os dados filtrados e as figuras das seleções vizinhas à
+atual (as outras regiões com o mesmo indicador, os outros indicadores na
+mesma região). Os resultados vão para os caches compartilhados do processo
+(`carregar_dados`, `obter_derivado`, `cache_figuras`), de modo que o próximo
+clique encontra tudo pronto na memória.
+
+As tarefas não chamam funções do Streamlit; elas apenas preenchem caches.
+Cada tarefa é identificada por uma chave, e cada rodada pela sessão que a
+agendou. Uma chave já agendada (por qualquer sessão) não é executada de
+novo. Quando uma sessão agenda uma nova rodada, as tarefas da sua rodada
+anterior que ainda não começaram são canceladas, a menos que outra sessão
+também esteja esperando por elas; as rodadas das demais sessões não são
+afetadas.
+
+O pré-carregamento pode ser desligado com `NATAL_PREFETCH=0`, e o número
+de threads é controlado por `NATAL_PREFETCH_THREADS` (padrão: 2).
+
+Uso:
+
+    prefetch = obter_prefetch()
+    prefetch.agendar({
+        ('sul', 'populacao'): lambda: preparar_selecao('sul', 'populacao'),
+        ...
+    }, sessao=id_sessao(st.session_state))
+"""
+
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+PREFETCH_ATIVO = os.environ.get('NATAL_PREFETCH', '1') != '0'
+
+THREADS_PADRAO = int(os.environ.get('NATAL_PREFETCH_THREADS', 2))
+
+
+class Prefetch:
+    """Pool de threads que executa tarefas de pré-carregamento sem repetição."""
+
+    def __init__(self, threads=THREADS_PADRAO):
+        self._executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='natal-prefetch'
+        )
+        # (sessão, chave) -> Future; sessões que agendam a mesma chave
+        # compartilham o mesmo Future
+        self._pendentes = {}
+        self._trava = threading.Lock()
+        self.agendadas = 0
+        self.concluidas = 0
+        self.canceladas = 0
+        self.erros = 0
+        self.ultimo_erro = None
+
+    def agendar(self, tarefas, sessao=None):
+        """
+        Agenda a rodada de tarefas de uma sessão, dadas como {chave: funcao_sem_argumentos}.
+
+        Tarefas pendentes da rodada anterior da mesma sessão que não estão na
+        nova rodada deixam de ser esperadas por ela, e são canceladas se
+        ainda não começaram e nenhuma outra sessão as espera.
+        """
+        with self._trava:
+            for (dona, chave), futuro in list(self._pendentes.items()):
+                if dona != sessao or chave in tarefas:
+                    continue
+                del self._pendentes[(dona, chave)]
+                compartilhado = any(f is futuro for f in self._pendentes.values())
+                if not compartilhado and futuro.cancel():
+                    self.canceladas += 1
+
+            em_andamento = {chave: futuro for (_, chave), futuro in self._pendentes.items()}
+            for chave, tarefa in tarefas.items():
+                if (sessao, chave) in self._pendentes:
+                    continue
+                futuro = em_andamento.get(chave)
+                if futuro is None:
+                    futuro = self._executor.submit(self._executar, chave, tarefa)
+                    self.agendadas += 1
+                self._pendentes[(sessao, chave)] = futuro
+
+    def _executar(self, chave, tarefa):
+        try:
+            tarefa()
+        except Exception as erro:
+            # Uma falha no pré-carregamento não afeta a sessão: a seleção
+            # será calculada normalmente quando for pedida
+            with self._trava:
+                self.erros += 1
+                self.ultimo_erro = f'{chave!r}: {erro!r}'
+        else:
+            with self._trava:
+                self.concluidas += 1
+        finally:
+            with self._trava:
+                for pendente in [p for p in self._pendentes if p[1] == chave]:
+                    del self._pendentes[pendente]
+
+    def aguardar(self, timeout=None):
+        """Espera as tarefas pendentes terminarem (útil em benchmarks e testes)."""
+        with self._trava:
+            futuros = list({id(f): f for f in self._pendentes.values()}.values())
+        for futuro in futuros:
+            if not futuro.cancelled():
+                futuro.exception(timeout=timeout)
+
+    def estatisticas(self):
+        """Contadores do pré-carregamento, para exibição ou log."""
+        with self._trava:
+            return {
+                'pendentes': len({id(f) for f in self._pendentes.values()}),
+                'agendadas': self.agendadas,
+                'concluidas': self.concluidas,
+                'canceladas': self.canceladas,
+                'erros': self.erros,
+                'ultimo_erro': self.ultimo_erro,
+            }
+
+    def encerrar(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_prefetch = None
+_trava_prefetch = threading.Lock()
+
+
+def id_sessao(estado, chave='id_sessao_prefetch'):
+    """Identificador da sessão, guardado no `st.session_state` recebido em `estado`."""
+    if chave not in estado:
+        estado[chave] = uuid.uuid4().hex
+    return estado[chave]
+
+
+def obter_prefetch():
+    """
+    Retorna o pool de pré-carregamento do processo, ou None se estiver desligado.
+
+    O pool é único por processo e compartilhado pelas sessões, assim como os
+    caches que ele preenche.
+    """
+    global _prefetch
+    if not PREFETCH_ATIVO:
+        return None
+    with _trava_prefetch:
+        if _prefetch is None:
+            _prefetch = Prefetch()
+        return _prefetch
@@ -0,0 +1,141 @@
+"""
+Resumos de quantis por região, combináveis entre regiões
+
+`describe()` ordena a coluna inteira a cada execução para achar mediana e
+quartis. Aqui cada região ganha, uma vez por carga, um resumo com poucos
+pontos da sua distribuição:
+- os valores ordenados são divididos em `ceil(1 / erro)` faixas com o mesmo
+  número de linhas, e cada faixa guarda o seu valor central e o seu peso
+  (quantas linhas representa); partições pequenas guardam todos os valores
+- mínimo e máximo são guardados exatos
+- resumos de várias regiões se combinam juntando os pontos e ordenando por
+  valor: o custo depende do número de pontos, não do número de linhas
+
+Um quantil é lido interpolando o valor na posição `q * (N - 1)`, como no
+`describe()`. Cada faixa desloca a posição de no máximo o seu tamanho, então
+o erro de posição do resultado combinado fica em no máximo `erro * N`
+linhas. Quando todas as partições guardam todos os valores, o resultado é
+exato.
+
+Contagem, média e desvio padrão saem do cubo de agregados (`agregados.py`):
+
+    descrever('populacao', regioes=['norte', 'sul'])
+"""
+
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from .agregados import INDICADORES, combinar_regioes, cubo_regioes
+from .carregamento import obter_derivado
+
+# Erro de posição relativo dos quantis (0.01: até 1% das linhas)
+ERRO_PADRAO = float(os.environ.get('NATAL_QUANTIS_ERRO', 0.01))
+
+PERCENTIS_PADRAO = (0.25, 0.5, 0.75)
+
+
+class ResumoQuantis:
+    """Pontos (valor, peso) de uma distribuição, com mínimo e máximo exatos."""
+
+    def __init__(self, valores, pesos, minimo, maximo):
+        self.valores = np.asarray(valores, dtype='float64')
+        self.pesos = np.asarray(pesos, dtype='float64')
+        self.minimo = minimo
+        self.maximo = maximo
+        self.contagem = int(self.pesos.sum())
+
+    @classmethod
+    def de_valores(cls, valores, erro=ERRO_PADRAO):
+        """Resume uma coluna; valores ausentes são ignorados."""
+        valores = np.asarray(valores, dtype='float64')
+        ordenados = np.sort(valores[~np.isnan(valores)])
+        n = len(ordenados)
+        if not n:
+            return cls([], [], np.nan, np.nan)
+
+        faixas = math.ceil(1 / erro)
+        if n <= faixas:
+            return cls(ordenados, np.ones(n), ordenados[0], ordenados[-1])
+
+        # Limites das faixas e o valor na posição central de cada uma
+        limites = (np.arange(faixas + 1) * n) // faixas
+        centros = (limites[:-1] + limites[1:] - 1) // 2
+        return cls(ordenados[centros], np.diff(limites), ordenados[0], ordenados[-1])
+
+    @classmethod
+    def combinar(cls, resumos):
+        """Junta resumos de partições disjuntas em um resumo do conjunto."""
+        resumos = [r for r in resumos if r.contagem]
+        if not resumos:
+            return cls([], [], np.nan, np.nan)
+        valores = np.concatenate([r.valores for r in resumos])
+        pesos = np.concatenate([r.pesos for r in resumos])
+        ordem = np.argsort(valores, kind='stable')
+        return cls(valores[ordem], pesos[ordem],
+                   min(r.minimo for r in resumos), max(r.maximo for r in resumos))
+
+    def __len__(self):
+        return len(self.valores)
+
+    def quantis(self, qs):
+        """Quantis aproximados para as frações em `qs` (entre 0 e 1)."""
+        qs = np.asarray(qs, dtype='float64')
+        if not self.contagem:
+            return np.full(qs.shape, np.nan)
+        # Posição (a partir de 0) do centro de cada ponto entre as linhas
+        posicoes = np.cumsum(self.pesos) - self.pesos / 2 - 0.5
+        xp = np.concatenate([[0.0], posicoes, [self.contagem - 1.0]])
+        fp = np.concatenate([[self.minimo], self.valores, [self.maximo]])
+        return np.interp(qs * (self.contagem - 1), xp, fp)
+
+
+def construir_resumos(df, colunas=INDICADORES, por='regiao', erro=ERRO_PADRAO):
+    """Um ResumoQuantis por (indicador, região), em uma ordenação por grupo."""
+    grupos = df.groupby(por, observed=True, sort=True)
+    return {
+        coluna: {
+            regiao: ResumoQuantis.de_valores(serie.to_numpy(), erro)
+            for regiao, serie in grupos[coluna]
+        }
+        for coluna in colunas
+    }
+
+
+def resumos_regioes(fonte=None, erro=ERRO_PADRAO):
+    """Resumos do dataset carregado, construídos uma vez por carga e por erro."""
+    return obter_derivado(
+        f'resumos_quantis:{erro}', lambda df: construir_resumos(df, erro=erro), fonte
+    )
+
+
+def descrever(coluna, regioes=None, percentis=PERCENTIS_PADRAO, fonte=None, erro=ERRO_PADRAO):
+    """
+    Equivalente a `df[coluna].describe()` para as regiões pedidas (todas, sem `regioes`).
+
+    Contagem, média, desvio padrão, mínimo e máximo são exatos (cubo de
+    agregados); os percentis vêm da combinação dos resumos das regiões.
+    """
+    resumos = resumos_regioes(fonte, erro)[coluna]
+    regioes = list(resumos) if regioes is None else [r for r in regioes if r in resumos]
+
+    linha = combinar_regioes(cubo_regioes(fonte), regioes)[coluna]
+    contagem = linha['count']
+    media = linha['sum'] / contagem if contagem else np.nan
+    variancia = (linha['sum_sq'] - contagem * media ** 2) / (contagem - 1) if contagem > 1 else np.nan
+
+    resumo = ResumoQuantis.combinar([resumos[r] for r in regioes])
+    valores = resumo.quantis(percentis)
+
+    estatisticas = {
+        'count': contagem,
+        'mean': media,
+        'std': math.sqrt(max(variancia, 0.0)) if not np.isnan(variancia) else np.nan,
+        'min': linha['min'],
+    }
+    for percentil, valor in zip(percentis, valores):
+        estatisticas[f'{percentil * 100:g}%'] = valor
+    estatisticas['max'] = linha['max']
+    return pd.Series(estatisticas, name=coluna)
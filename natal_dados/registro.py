@@ -0,0 +1,251 @@
+"""
+Registro de datasets (cidades) e armazenamento particionado por região
+
+Cada cidade é registrada com o seu título, as suas regiões, a fonte dos
+dados brutos e a sua tabela de correções de nomes. Registrar uma cidade não
+carrega nada: os dados só são lidos quando ela é selecionada.
+
+Os dados limpos de cada cidade podem ser gravados em partições, um snapshot
+Arrow por região:
+
+    natal_dados/particoes/<cidade>/regiao=<regiao>.arrow
+
+Uma fonte 'dataset:<cidade>/<regiao>' lê apenas a partição da região
+escolhida (via mmap). Sem partições gravadas, a fonte completa da cidade é
+lida uma vez e as regiões são selecionadas em memória.
+
+Cada partição guarda nos metadados do esquema a sua linha do cubo de
+agregados (indicadores e coordenadas). Com `cubo_dataset`, limites dos
+filtros, extensão do mapa e estatísticas por região saem desses metadados,
+sem carregar nenhuma partição.
+
+Para gravar as partições:
+
+    python -m natal_dados --particoes natal
+"""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+from .agregados import ESTATISTICAS, INDICADORES, construir_cubo
+from .carregamento import (
+    PREFIXO_DATASET,
+    carregar_colunas,
+    carregar_dados,
+    colunas_disponiveis,
+    compactar_tipos,
+    limpar_dados,
+    obter_derivado,
+    resolver_fonte,
+)
+from .correcoes import CORRECOES_NATAL
+from .snapshot import carregar_snapshot, construir_snapshot, metadados_snapshot
+
+DIRETORIO_PARTICOES = Path(__file__).resolve().parent / 'particoes'
+
+# Colunas do cubo de cada partição: os indicadores e as coordenadas (extensão do mapa)
+COLUNAS_CUBO = INDICADORES + ['x', 'y']
+
+# Chave dos metadados da partição onde a sua linha do cubo é guardada
+CHAVE_CUBO = 'natal_dados.cubo'
+
+
+class Dataset:
+    """Descrição de um dataset de cidade."""
+
+    def __init__(self, nome, titulo, regioes, fonte=None, correcoes=None):
+        # Identificador usado nas fontes e no caminho das partições
+        self.nome = nome
+        # Nome exibido na interface, por exemplo 'Natal/RN'
+        self.titulo = titulo
+        self.regioes = list(regioes)
+        # URL ou caminho dos dados brutos; None usa a fonte padrão do carregamento,
+        # limpa com as correções deste dataset
+        self.fonte = fonte
+        # Nome original normalizado -> nome corrigido
+        self.correcoes = correcoes or {}
+
+    def __repr__(self):
+        return f'Dataset({self.nome!r}, {self.titulo!r})'
+
+
+DATASETS = {}
+
+
+def registrar(dataset):
+    """Adiciona (ou substitui) um dataset no registro."""
+    DATASETS[dataset.nome] = dataset
+    return dataset
+
+
+def obter_dataset(nome):
+    try:
+        return DATASETS[nome]
+    except KeyError:
+        raise ValueError(f'Dataset não registrado: {nome!r}') from None
+
+
+registrar(Dataset(
+    'natal',
+    'Natal/RN',
+    regioes=['leste', 'norte', 'oeste', 'sul'],
+    correcoes=CORRECOES_NATAL,
+))
+
+
+# Dataset usado quando nenhuma cidade é escolhida (armazém e exemplos)
+DATASET_PADRAO = 'natal'
+
+
+def fonte_dataset(nome, regioes=None):
+    """Monta a fonte de carregamento para uma cidade e, opcionalmente, algumas regiões."""
+    if not regioes:
+        return f'{PREFIXO_DATASET}{nome}'
+    return f'{PREFIXO_DATASET}{nome}/{",".join(sorted(regioes))}'
+
+
+def correcoes_da_fonte(fonte=None):
+    """
+    Tabela de correções aplicada aos dados de uma fonte.
+
+    Fontes 'dataset:' usam a do dataset; as demais passam pela limpeza
+    padrão do carregamento, com as correções de Natal.
+    """
+    tipo, local = resolver_fonte(fonte)
+    if tipo == 'dataset':
+        return obter_dataset(local.partition('/')[0]).correcoes
+    return CORRECOES_NATAL
+
+
+def caminho_particao(nome, regiao):
+    return DIRETORIO_PARTICOES / nome / f'regiao={regiao}.arrow'
+
+
+def _fonte_bruta(dataset):
+    # Sem fonte própria, resolve a fonte padrão do carregamento
+    # (NATAL_DADOS_FONTE, snapshot ou URL)
+    tipo, local = resolver_fonte(dataset.fonte)
+    if tipo == 'dataset':
+        raise ValueError(f'A fonte do dataset {dataset.nome!r} não pode ser outro dataset: {local!r}')
+    return tipo, local
+
+
+def _carregar_fonte_bruta(dataset, colunas=None):
+    # A limpeza usa sempre as correções do dataset; com `colunas`, só elas são lidas
+    tipo, local = _fonte_bruta(dataset)
+    if tipo == 'snapshot':
+        # Snapshots já guardam os dados limpos
+        return compactar_tipos(carregar_snapshot(local, colunas=colunas))
+    return compactar_tipos(limpar_dados(pd.read_csv(local, usecols=colunas), dataset.correcoes))
+
+
+def carregar_particoes(local, colunas=None):
+    """
+    Lê uma cidade inteira ou só algumas regiões (`local` = 'natal' ou 'natal/norte,sul').
+
+    Chamado pelo carregamento para fontes 'dataset:'; cada partição passa
+    pelo cache do processo individualmente. Com `colunas`, só elas são lidas
+    (ver `carregamento.carregar_colunas`).
+    """
+    nome, _, selecao = local.partition('/')
+    dataset = obter_dataset(nome)
+    regioes = selecao.split(',') if selecao else dataset.regioes
+
+    caminhos = [caminho_particao(nome, regiao) for regiao in regioes]
+    if all(caminho.exists() for caminho in caminhos):
+        if colunas is None:
+            partes = [carregar_dados(str(caminho)) for caminho in caminhos]
+        else:
+            partes = [carregar_colunas(colunas, str(caminho)) for caminho in caminhos]
+        if len(partes) == 1:
+            return partes[0]
+        # Concatenar categorias diferentes gera texto; compacta de novo
+        return compactar_tipos(pd.concat(partes, ignore_index=True))
+
+    if not selecao:
+        return _carregar_fonte_bruta(dataset, colunas)
+    if colunas is None:
+        completo = carregar_dados(fonte_dataset(nome))
+        return completo[completo['regiao'].isin(regioes)].reset_index(drop=True)
+    # A região é lida junto, para a seleção das linhas, e descartada depois
+    lidas = list(dict.fromkeys([*colunas, 'regiao']))
+    completo = carregar_colunas(lidas, fonte_dataset(nome))
+    return completo.loc[completo['regiao'].isin(regioes), colunas].reset_index(drop=True)
+
+
+def colunas_particoes(local):
+    """Nomes das colunas de um dataset, lidos do esquema de uma partição ou do cabeçalho da fonte."""
+    nome = local.partition('/')[0]
+    dataset = obter_dataset(nome)
+    caminho = caminho_particao(nome, dataset.regioes[0])
+    if caminho.exists():
+        return colunas_disponiveis(str(caminho))
+    _, origem = _fonte_bruta(dataset)
+    return colunas_disponiveis(origem)
+
+
+def construir_particoes(nome):
+    """
+    Grava uma partição Arrow por região da cidade e retorna {regiao: hash}.
+
+    A linha do cubo de agregados de cada região vai junto, nos metadados da
+    partição (ver `cubo_dataset`).
+    """
+    dataset = obter_dataset(nome)
+    df = _carregar_fonte_bruta(dataset)
+    hashes = {}
+    for regiao, grupo in df.groupby('regiao', observed=True):
+        grupo = grupo.reset_index(drop=True)
+        linha = construir_cubo(grupo, COLUNAS_CUBO).iloc[0]
+        cubo = {
+            coluna: {estatistica: float(linha[(coluna, estatistica)]) for estatistica in ESTATISTICAS}
+            for coluna in COLUNAS_CUBO
+        }
+        hashes[regiao] = construir_snapshot(
+            grupo, caminho_particao(nome, regiao), metadados={CHAVE_CUBO: json.dumps(cubo)}
+        )
+    return hashes
+
+
+@lru_cache(maxsize=256)
+def _cubo_particao(caminho, versao):
+    # `versao` (mtime) faz uma partição regravada ser lida de novo
+    texto = metadados_snapshot(caminho).get(CHAVE_CUBO)
+    if texto is None:
+        return None
+    return {
+        (coluna, estatistica): valor
+        for coluna, valores in json.loads(texto).items()
+        for estatistica, valor in valores.items()
+    }
+
+
+def cubo_dataset(nome):
+    """
+    Cubo de agregados da cidade (ver `agregados.py`), por região, sobre
+    COLUNAS_CUBO, sem carregar os dados quando há partições.
+
+    Com todas as partições gravadas, as linhas vêm dos seus metadados (só os
+    esquemas são lidos). Caso contrário, o cubo é calculado uma vez por carga
+    a partir da cidade inteira.
+    """
+    dataset = obter_dataset(nome)
+    linhas = {}
+    for regiao in dataset.regioes:
+        caminho = caminho_particao(nome, regiao)
+        linha = _cubo_particao(str(caminho), caminho.stat().st_mtime_ns) if caminho.exists() else None
+        if linha is None:
+            return obter_derivado(
+                'cubo_dataset', lambda df: construir_cubo(df, COLUNAS_CUBO), fonte_dataset(nome)
+            )
+        linhas[regiao] = linha
+
+    cubo = pd.DataFrame.from_dict(linhas, orient='index')
+    cubo = cubo.reindex(columns=pd.MultiIndex.from_product([COLUNAS_CUBO, ESTATISTICAS]))
+    # Os metadados guardam tudo como float; contagens voltam a ser inteiras
+    cubo = cubo.astype({coluna: 'int64' for coluna in cubo.columns if coluna[1] == 'count'})
+    cubo.index.name = 'regiao'
+    return cubo
@@ -0,0 +1,56 @@
+"""
+Geração de dados sintéticos com o mesmo esquema do dataset de bairros
+
+Usado pelos benchmarks para simular conjuntos em escala de setores
+censitários (dezenas de milhares a milhões de linhas) sem depender da rede.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Colunas do dataset limpo, na ordem original
+COLUNAS = [
+    'bairro',
+    'regiao',
+    'x',
+    'y',
+    'populacao',
+    'renda_mensal_pessoa',
+    'rendimento_nominal_medio',
+]
+
+REGIOES = ['norte', 'sul', 'leste', 'oeste']
+
+# Salário mínimo usado para derivar o rendimento nominal médio
+SALARIO_MINIMO = 510.0
+
+
+def gerar_bairros(n, seed=0, regioes=REGIOES):
+    """
+    Gera um DataFrame com `n` unidades espaciais sintéticas.
+
+    As coordenadas ficam em um retângulo em metros, parecido com o de Natal,
+    e a renda segue uma distribuição log-normal, com o rendimento nominal
+    médio derivado dela em salários mínimos.
+    """
+    rng = np.random.default_rng(seed)
+
+    regiao = rng.choice(np.asarray(regioes, dtype=object), size=n)
+    x = rng.uniform(245_000.0, 262_000.0, size=n)
+    y = rng.uniform(9_350_000.0, 9_370_000.0, size=n)
+    populacao = rng.integers(500, 80_000, size=n)
+    renda = np.round(rng.lognormal(mean=6.8, sigma=0.7, size=n), 2)
+    rendimento = np.round(renda * rng.uniform(1.8, 2.6, size=n) / SALARIO_MINIMO, 2)
+
+    largura = len(str(n))
+    bairro = [f'setor_{i:0{largura}d}' for i in range(n)]
+
+    return pd.DataFrame({
+        'bairro': bairro,
+        'regiao': regiao,
+        'x': x,
+        'y': y,
+        'populacao': populacao,
+        'renda_mensal_pessoa': renda,
+        'rendimento_nominal_medio': rendimento,
+    }, columns=COLUNAS)
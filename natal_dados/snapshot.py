@@ -0,0 +1,126 @@
+"""
+Snapshot colunar (Arrow IPC) do dataset já limpo
+
+O snapshot é gravado sem compressão para que possa ser mapeado em memória
+(mmap) pelo pyarrow. Assim, réplicas iniciam sem acesso à rede e sem parsing
+de CSV, e vários processos de trabalho compartilham as mesmas páginas do
+arquivo em vez de manter cada um a sua cópia.
+
+Um hash SHA-256 do conteúdo é gravado nos metadados do arquivo e em um
+arquivo auxiliar `.sha256`, o que permite detectar snapshots desatualizados.
+
+Para gerar o snapshot a partir da fonte configurada:
+
+    python -m natal_dados [fonte] [destino]
+"""
+
+import hashlib
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+# Snapshot distribuído junto com o pacote
+CAMINHO_SNAPSHOT = Path(__file__).resolve().parent / 'snapshot' / 'bairros_natal.arrow'
+
+# Textos sem dicionário continuam em memória Arrow, como string[pyarrow]
+_TIPOS_PANDAS = {
+    pa.string(): pd.StringDtype('pyarrow'),
+    pa.large_string(): pd.StringDtype('pyarrow'),
+}
+
+# Chave dos metadados do esquema onde o hash do conteúdo é guardado
+CHAVE_HASH = b'natal_dados.sha256'
+
+
+def calcular_hash(tabela):
+    """Calcula o SHA-256 do conteúdo da tabela, ignorando metadados."""
+    tabela = tabela.replace_schema_metadata(None)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return hashlib.sha256(sink.getvalue()).hexdigest()
+
+
+def construir_snapshot(df, destino=CAMINHO_SNAPSHOT, metadados=None):
+    """
+    Grava o DataFrame limpo como arquivo Arrow IPC não comprimido.
+
+    `metadados` (texto -> texto) entra nos metadados do esquema, que podem
+    ser lidos sem carregar os dados (`metadados_snapshot`). Retorna o hash do
+    conteúdo, que também fica salvo em `<destino>.sha256`.
+    """
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    digest = calcular_hash(tabela)
+    esquema = dict(tabela.schema.metadata or {})
+    for chave, valor in (metadados or {}).items():
+        esquema[chave.encode()] = valor.encode()
+    esquema[CHAVE_HASH] = digest.encode()
+    tabela = tabela.replace_schema_metadata(esquema)
+
+    # Grava em arquivo temporário e renomeia, para que leitores nunca vejam
+    # um snapshot pela metade
+    temporario = destino.with_suffix(destino.suffix + '.tmp')
+    opcoes = pa.ipc.IpcWriteOptions(compression=None)
+    with pa.OSFile(str(temporario), 'wb') as sink:
+        with pa.ipc.new_file(sink, tabela.schema, options=opcoes) as escritor:
+            escritor.write_table(tabela)
+    temporario.replace(destino)
+    Path(str(destino) + '.sha256').write_text(digest + '\n')
+
+    return digest
+
+
+def ler_tabela_snapshot(caminho=CAMINHO_SNAPSHOT, verificar=False):
+    """
+    Abre o snapshot via mmap e retorna a `pyarrow.Table` sem copiar os dados.
+
+    Com `verificar=True`, recalcula o hash do conteúdo e lança ValueError se
+    ele não bater com o registrado no arquivo.
+    """
+    fonte = pa.memory_map(str(caminho), 'r')
+    tabela = pa.ipc.open_file(fonte).read_all()
+
+    if verificar:
+        esperado = (tabela.schema.metadata or {}).get(CHAVE_HASH, b'').decode()
+        obtido = calcular_hash(tabela)
+        if esperado != obtido:
+            raise ValueError(
+                f'Snapshot {caminho} corrompido: hash {obtido}, esperado {esperado}'
+            )
+
+    return tabela
+
+
+def esquema_snapshot(caminho=CAMINHO_SNAPSHOT):
+    """Esquema Arrow do snapshot (nomes, tipos e metadados), sem ler os dados."""
+    with pa.memory_map(str(caminho), 'r') as fonte:
+        return pa.ipc.open_file(fonte).schema
+
+
+def metadados_snapshot(caminho=CAMINHO_SNAPSHOT):
+    """Metadados do esquema do snapshot (texto -> texto), lendo apenas o esquema."""
+    esquema = esquema_snapshot(caminho)
+    return {chave.decode(): valor.decode() for chave, valor in (esquema.metadata or {}).items()}
+
+
+def hash_snapshot(caminho=CAMINHO_SNAPSHOT):
+    """Retorna o hash registrado no snapshot, lendo apenas o esquema."""
+    return metadados_snapshot(caminho).get(CHAVE_HASH.decode(), '')
+
+
+def carregar_snapshot(caminho=CAMINHO_SNAPSHOT, verificar=False, colunas=None):
+    """
+    Carrega o snapshot como DataFrame.
+
+    As colunas numéricas sem valores ausentes são convertidas sem cópia e
+    continuam apontando para as páginas mapeadas do arquivo. Com `colunas`,
+    só elas são convertidas; as páginas das demais não são lidas do disco.
+    """
+    tabela = ler_tabela_snapshot(caminho, verificar=verificar)
+    if colunas is not None:
+        tabela = tabela.select(list(colunas))
+    return tabela.to_pandas(split_blocks=True, types_mapper=_TIPOS_PANDAS.get)
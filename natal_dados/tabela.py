@@ -0,0 +1,193 @@
+"""
+Tabela paginada no servidor
+
+`st.dataframe(df)` serializa o DataFrame inteiro e o envia ao navegador a
+cada rerun, mesmo que só algumas dezenas de linhas fiquem visíveis. Aqui a
+tabela é fatiada no servidor e só a página visível é serializada:
+- as linhas exibidas são dadas por posições (por exemplo, as de
+  `FiltroIncremental.indices()`), sem materializar o DataFrame filtrado
+- a ordenação é feita no servidor e guardada na sessão, então trocar de
+  página não ordena de novo
+- para colunas com índice ordenado (`indices.py`) a ordem já está pronta:
+  basta percorrer a permutação do índice e manter as linhas selecionadas,
+  em O(n), sem ordenar
+- só as colunas escolhidas são copiadas para a página
+- `pyarrow.Table` (ver `colunar.py`) também é aceita: a página é uma fatia
+  sem cópia (`slice`) ou um `take` da ordem calculada por
+  `pyarrow.compute.sort_indices`, e vai para `st.dataframe` sem passar
+  pelo pandas
+
+O custo por rerun fica proporcional ao tamanho da página, e não ao número
+de linhas do resultado.
+
+Uso em um script Streamlit:
+
+    tabela_paginada(df_natal, chave='dados', posicoes=filtro.indices(),
+                    indices=indices_ordenados())
+"""
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import streamlit as st
+
+LINHAS_POR_PAGINA = 50
+
+OPCOES_LINHAS_POR_PAGINA = (25, 50, 100, 250)
+
+SEM_ORDENACAO = '(ordem original)'
+
+
+def ordenar_posicoes(df, posicoes=None, coluna=None, crescente=True, indices=None):
+    """
+    Posições das linhas selecionadas na ordem de exibição.
+
+    Sem `coluna`, mantém a ordem original. Valores ausentes ficam no fim nos
+    dois sentidos, como em `DataFrame.sort_values`, e empates mantêm a ordem
+    original das linhas.
+
+    Para uma `pyarrow.Table`, `posicoes` e `indices` não se aplicam (o filtro
+    já produz a tabela) e a ordem volta como array Arrow, ou None sem `coluna`.
+    """
+    if isinstance(df, pa.Table):
+        return _ordenar_arrow(df, coluna, crescente)
+
+    todas = posicoes is None or len(posicoes) == len(df)
+    posicoes = np.arange(len(df)) if posicoes is None else np.asarray(posicoes, dtype=np.int64)
+    if coluna is None:
+        return posicoes
+
+    indice = (indices or {}).get(coluna)
+    if indice is not None and len(indice) == len(df):
+        ordem, valores = indice.ordem, indice.valores_ordenados
+        if not todas:
+            # Percorre a ordem do índice mantendo só as linhas selecionadas
+            selecionadas = np.zeros(len(df), dtype=bool)
+            selecionadas[posicoes] = True
+            manter = selecionadas[ordem]
+            ordem, valores = ordem[manter], valores[manter]
+        if crescente:
+            return ordem
+        # Os ausentes ficam no fim do índice e continuam no fim
+        validas = len(ordem) - int(pd.isna(valores).sum())
+        return np.concatenate([_inverter_estavel(valores[:validas], ordem[:validas]), ordem[validas:]])
+
+    valores = df[coluna].iloc[posicoes].reset_index(drop=True)
+    ordem = valores.sort_values(ascending=crescente, kind='stable', na_position='last').index
+    return posicoes[ordem.to_numpy()]
+
+
+def _inverter_estavel(valores, ordem):
+    """
+    Inverte uma ordem crescente estável sem inverter os empates.
+
+    Cada grupo de valores iguais vai para a posição espelhada, mas mantém a
+    ordem interna, em O(n) e sem ordenar de novo.
+    """
+    n = len(valores)
+    if not n:
+        return ordem
+    inicio = np.r_[True, valores[1:] != valores[:-1]]
+    grupo = np.cumsum(inicio) - 1
+    inicio_grupo = np.flatnonzero(inicio)
+    fim_grupo = np.r_[inicio_grupo[1:], n]
+    destino = n - fim_grupo[grupo] + (np.arange(n) - inicio_grupo[grupo])
+    invertida = np.empty_like(ordem)
+    invertida[destino] = ordem
+    return invertida
+
+
+def _ordenar_arrow(tabela, coluna, crescente):
+    if coluna is None:
+        return None
+    valores = tabela.column(coluna)
+    # O kernel de ordenação não aceita dicionários: ordena pelos valores
+    if pa.types.is_dictionary(valores.type):
+        valores = pc.cast(valores, valores.type.value_type)
+    # A ordenação é estável e põe nulos e NaN no fim nos dois sentidos
+    return pc.array_sort_indices(valores, order='ascending' if crescente else 'descending',
+                                 null_placement='at_end')
+
+
+def _colunas(df):
+    return list(df.column_names if isinstance(df, pa.Table) else df.columns)
+
+
+def fatiar_pagina(df, ordem, pagina, linhas_por_pagina=LINHAS_POR_PAGINA, colunas=None):
+    """DataFrame (ou tabela Arrow) com as linhas da página (começando em 1) e só as colunas pedidas."""
+    inicio = (pagina - 1) * linhas_por_pagina
+    if isinstance(df, pa.Table):
+        if ordem is None:
+            tabela = df.slice(inicio, linhas_por_pagina)
+        else:
+            tabela = df.take(ordem.slice(inicio, linhas_por_pagina))
+        return tabela if colunas is None else tabela.select(list(colunas))
+    linhas = ordem[inicio:inicio + linhas_por_pagina]
+    if colunas is None:
+        return df.iloc[linhas]
+    return df.iloc[linhas, df.columns.get_indexer(list(colunas))]
+
+
+def _ordem_em_cache(chave, df, posicoes, coluna, crescente, indices):
+    # A ordem fica na sessão enquanto os dados, a seleção e a ordenação não
+    # mudam; `FiltroIncremental.indices()` devolve o mesmo array quando os
+    # filtros não mudam, então a comparação por identidade basta
+    entrada = st.session_state.get(chave)
+    if (entrada is not None and entrada['df'] is df and entrada['posicoes'] is posicoes
+            and entrada['ordenacao'] == (coluna, crescente)):
+        return entrada['ordem']
+    ordem = ordenar_posicoes(df, posicoes, coluna, crescente, indices)
+    st.session_state[chave] = {
+        'df': df, 'posicoes': posicoes, 'ordenacao': (coluna, crescente), 'ordem': ordem,
+    }
+    return ordem
+
+
+def tabela_paginada(df, chave, posicoes=None, indices=None, colunas=None,
+                    linhas_por_pagina=LINHAS_POR_PAGINA, **kwargs_dataframe):
+    """
+    Exibe `df` (ou só as linhas em `posicoes`) uma página por vez.
+
+    `df` pode ser um DataFrame ou uma `pyarrow.Table`. `chave` distingue os
+    widgets de cada tabela na página. `colunas` define
+    as colunas exibidas inicialmente; o usuário pode escolher outras. Os
+    demais argumentos vão para `st.dataframe`. Retorna a página exibida.
+    """
+    total = len(df) if posicoes is None else len(posicoes)
+
+    with st.expander('Colunas e ordenação'):
+        colunas_exibidas = st.multiselect(
+            'Colunas:', _colunas(df),
+            default=_colunas(df) if colunas is None else list(colunas),
+            key=f'{chave}_colunas'
+        )
+        coluna_ordem = st.selectbox(
+            'Ordenar por:', [SEM_ORDENACAO] + _colunas(df), key=f'{chave}_ordenar'
+        )
+        decrescente = st.checkbox('Ordem decrescente', key=f'{chave}_decrescente')
+        linhas_por_pagina = st.selectbox(
+            'Linhas por página:', OPCOES_LINHAS_POR_PAGINA,
+            index=OPCOES_LINHAS_POR_PAGINA.index(linhas_por_pagina)
+            if linhas_por_pagina in OPCOES_LINHAS_POR_PAGINA else 0,
+            key=f'{chave}_linhas_por_pagina'
+        )
+
+    paginas = max(1, -(-total // linhas_por_pagina))
+    # Se o resultado encolheu, a página guardada na sessão pode não existir mais
+    chave_pagina = f'{chave}_pagina'
+    if st.session_state.get(chave_pagina, 1) > paginas:
+        st.session_state[chave_pagina] = paginas
+    pagina = st.number_input('Página:', min_value=1, max_value=paginas, step=1, key=chave_pagina)
+
+    coluna = None if coluna_ordem == SEM_ORDENACAO else coluna_ordem
+    ordem = _ordem_em_cache(f'{chave}_ordem', df, posicoes, coluna, not decrescente, indices)
+    tabela = fatiar_pagina(df, ordem, pagina, linhas_por_pagina, colunas_exibidas)
+
+    st.dataframe(tabela, **kwargs_dataframe)
+    inicio = (pagina - 1) * linhas_por_pagina
+    st.caption(
+        f'Linhas {min(inicio + 1, total)}–{min(inicio + linhas_por_pagina, total)} '
+        f'de {total} (página {pagina} de {paginas})'
+    )
+    return tabela
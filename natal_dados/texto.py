@@ -0,0 +1,18 @@
+"""
+Normalização de textos (nomes de bairros, regiões e cidades)
+
+Minúsculas, sem acentos e com `_` e pontuação trocados por espaço, para que
+variações como "Nazaré", "nazare" e "NAZARE_" sejam comparáveis.
+"""
+
+import re
+import unicodedata
+
+_NAO_ALFANUMERICO = re.compile(r'[^0-9a-z]+')
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos, e com tudo que não for letra ou número virando espaço."""
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return _NAO_ALFANUMERICO.sub(' ', texto.lower()).strip()
@@ -0,0 +1,180 @@
+"""
+Leitura em blocos de arquivos CSV enviados pelo usuário
+
+Em vez de `pd.read_csv(arquivo)` sobre o arquivo inteiro, o CSV é lido em
+blocos de tamanho fixo:
+- O esquema (colunas e tipos) é definido e validado no primeiro bloco
+- Os blocos seguintes são convertidos para os mesmos tipos; divergências
+  geram erro com a faixa de linhas do bloco. A exceção é uma coluna inferida
+  como inteira que recebe decimais: ela é alargada para float64
+- Resumos (contagem, nulos, mínimo, máximo, média) são atualizados a cada
+  bloco, sem guardar os dados já lidos
+
+Assim a memória de parsing fica limitada pelo tamanho do bloco, e a prévia
+pode ser mostrada assim que o primeiro bloco chega.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Linhas por bloco
+TAMANHO_BLOCO = 50_000
+
+# Tipos conhecidos das colunas do dataset de bairros
+ESQUEMA_BAIRROS = {
+    'bairro': 'string',
+    'regiao': 'string',
+    'x': 'float64',
+    'y': 'float64',
+    'populacao': 'float64',
+    'renda_mensal_pessoa': 'float64',
+    'rendimento_nominal_medio': 'float64',
+}
+
+
+class ErroEsquema(ValueError):
+    """O arquivo enviado não segue o esquema esperado."""
+
+
+class ResumoIncremental:
+    """Estatísticas das colunas numéricas, atualizadas bloco a bloco."""
+
+    def __init__(self):
+        self.linhas = 0
+        self.blocos = 0
+        self._contagem = None
+        self._nulos = None
+        self._soma = None
+        self._minimo = None
+        self._maximo = None
+
+    def atualizar(self, bloco):
+        self.linhas += len(bloco)
+        self.blocos += 1
+
+        numericas = bloco.select_dtypes(include='number')
+        contagem = numericas.count()
+        nulos = bloco.isna().sum()
+        soma = numericas.sum()
+        minimo = numericas.min()
+        maximo = numericas.max()
+
+        if self._contagem is None:
+            self._contagem, self._nulos, self._soma = contagem, nulos, soma
+            self._minimo, self._maximo = minimo, maximo
+        else:
+            self._contagem = self._contagem.add(contagem, fill_value=0)
+            self._nulos = self._nulos.add(nulos, fill_value=0)
+            self._soma = self._soma.add(soma, fill_value=0)
+            self._minimo = pd.concat([self._minimo, minimo], axis=1).min(axis=1)
+            self._maximo = pd.concat([self._maximo, maximo], axis=1).max(axis=1)
+
+    def tabela(self):
+        """Resumo atual das colunas numéricas, uma linha por coluna."""
+        if self._contagem is None:
+            return pd.DataFrame(columns=['contagem', 'nulos', 'mínimo', 'máximo', 'média'])
+        return pd.DataFrame({
+            'contagem': self._contagem.astype('int64'),
+            'nulos': self._nulos.reindex(self._contagem.index).astype('int64'),
+            'mínimo': self._minimo,
+            'máximo': self._maximo,
+            'média': self._soma / self._contagem.replace(0, np.nan),
+        })
+
+
+def validar_esquema(bloco, colunas_obrigatorias=()):
+    """
+    Confere o primeiro bloco e retorna o dicionário de tipos a ser usado nos demais.
+
+    Colunas inteiras viram 'Int64' (inteiro com nulos), para que um valor
+    ausente em um bloco posterior não seja tratado como divergência de tipo.
+    Se um bloco posterior trouxer decimais, `ler_csv_em_blocos` alarga a
+    coluna para float64.
+    """
+    if bloco.empty and len(bloco.columns) == 0:
+        raise ErroEsquema('o arquivo está vazio')
+
+    duplicadas = bloco.columns[bloco.columns.duplicated()].tolist()
+    if duplicadas:
+        raise ErroEsquema(f'colunas duplicadas: {", ".join(map(str, duplicadas))}')
+
+    faltando = [coluna for coluna in colunas_obrigatorias if coluna not in bloco.columns]
+    if faltando:
+        raise ErroEsquema(f'colunas obrigatórias ausentes: {", ".join(faltando)}')
+
+    esquema = {}
+    for coluna, tipo in bloco.dtypes.items():
+        if pd.api.types.is_integer_dtype(tipo):
+            tipo = 'Int64'
+        elif pd.api.types.is_bool_dtype(tipo):
+            tipo = 'boolean'
+        esquema[coluna] = tipo
+    return esquema
+
+
+def ler_csv_em_blocos(arquivo, tamanho_bloco=TAMANHO_BLOCO, dtype=None,
+                      colunas_obrigatorias=(), usecols=None):
+    """
+    Lê um CSV em blocos, gerando tuplas (bloco, resumo).
+
+    `dtype` fixa tipos explicitamente (por padrão, os de ESQUEMA_BAIRROS para
+    as colunas que existirem no arquivo); os demais tipos são os inferidos no
+    primeiro bloco e passam a valer para o arquivo inteiro; a única mudança
+    aceita depois é de inteiro para float64, quando um bloco traz decimais
+    (os blocos já gerados mantêm 'Int64', com os mesmos valores). `resumo` é
+    o mesmo ResumoIncremental a cada iteração, já atualizado com o bloco
+    corrente.
+
+    Erros de leitura do pandas (por exemplo, texto em uma coluna numérica de
+    `dtype`) são relançados como ErroEsquema.
+    """
+    dtype = ESQUEMA_BAIRROS if dtype is None else dtype
+    try:
+        leitor = pd.read_csv(arquivo, chunksize=tamanho_bloco, dtype=dtype, usecols=usecols)
+    except pd.errors.EmptyDataError as erro:
+        raise ErroEsquema('o arquivo está vazio') from erro
+    except ValueError as erro:
+        raise ErroEsquema(f'arquivo inválido: {erro}') from erro
+
+    resumo = ResumoIncremental()
+    esquema = None
+    inicio = 0
+    for bloco in _blocos(leitor):
+        if esquema is None:
+            esquema = validar_esquema(bloco, colunas_obrigatorias)
+            bloco = bloco.astype(esquema)
+        else:
+            if list(bloco.columns) != list(esquema):
+                raise ErroEsquema(f'colunas mudaram a partir da linha {inicio + 1}')
+            for coluna, tipo in esquema.items():
+                # Inteiros do primeiro bloco com decimais neste: a coluna vira
+                # float64 (um bloco só com nulos também é lido como float, mas
+                # continua cabendo em 'Int64')
+                valores = bloco[coluna]
+                if (tipo == 'Int64' and pd.api.types.is_float_dtype(valores)
+                        and (valores.dropna() % 1 != 0).any()):
+                    esquema[coluna] = 'float64'
+            try:
+                bloco = bloco.astype(esquema)
+            except (TypeError, ValueError) as erro:
+                raise ErroEsquema(
+                    f'tipos divergentes entre as linhas {inicio + 1} e {inicio + len(bloco)}: {erro}'
+                ) from erro
+
+        resumo.atualizar(bloco)
+        inicio += len(bloco)
+        yield bloco, resumo
+
+
+def _blocos(leitor):
+    # Os blocos do leitor; erros de conversão do pandas viram ErroEsquema
+    inicio = 0
+    while True:
+        try:
+            bloco = next(leitor)
+        except StopIteration:
+            return
+        except ValueError as erro:
+            raise ErroEsquema(f'valor inválido a partir da linha {inicio + 1}: {erro}') from erro
+        inicio += len(bloco)
+        yield bloco
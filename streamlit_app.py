@@ -15,10 +15,30 @@ Data: Junho 2024
 """
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
+from functools import partial
+
+from natal_dados import memoria_por_coluna
+from natal_dados.armazem import obter_armazem
+from natal_dados.agregados import combinar_regioes, estatisticas_por_regiao
+from natal_dados.busca import indice_busca
+from natal_dados.cache_figuras import cache_figuras, chave_figura
+from natal_dados.espacial import indice_espacial
+from natal_dados.grade import agregar_em_grade
+from natal_dados.juncao import indice_chave
+from natal_dados.graficos import (
+    BARRAS_TOP_N,
+    figura_barras,
+    figura_comparacao,
+    figura_espacial,
+    figura_grade,
+)
+from natal_dados.perfil import PERFIL_DESLIGADO, Perfil, perfil_ativo
+from natal_dados.prefetch import id_sessao, obter_prefetch
+from natal_dados.registro import DATASETS, cubo_dataset, fonte_dataset
+
+# Máximo de bairros oferecidos como referência para a consulta de proximidade
+CANDIDATOS_REFERENCIA = 20
 
 # Configuração da página
 st.set_page_config(
@@ -27,41 +47,42 @@ st.set_page_config(
     layout="wide"
 )
 
+# Modo de perfil (NATAL_PERFIL=1, ou ?perfil=1 na URL quando
+# NATAL_PERFIL_PERMITIR_URL=1): mede tempo e memória
+# de cada etapa desta execução
+perfil = Perfil(perfil_ativo(st.query_params))
+
+# Sidebar para filtros
+st.sidebar.header("Filtros")
+
+# Seleção da cidade: aqui só o registro de datasets é consultado; os dados
+# da cidade são lidos apenas depois de selecionada
+cidade = st.sidebar.selectbox(
+    "Selecione a Cidade:",
+    list(DATASETS),
+    format_func=lambda nome: DATASETS[nome].titulo
+)
+dataset = DATASETS[cidade]
+fonte_cidade = fonte_dataset(cidade)
+
 # Título e descrição
-st.title("📊 Análise Socioeconômica dos Bairros de Natal/RN")
-st.markdown("""
+st.title(f"📊 Análise Socioeconômica dos Bairros de {dataset.titulo}")
+st.markdown(f"""
 Esta aplicação demonstra como transformar análises de dados estáticas em visualizações interativas usando Streamlit e Plotly.
-Baseado na análise exploratória de dados socioeconômicos dos bairros de Natal/RN.
+Baseado na análise exploratória de dados socioeconômicos dos bairros de {dataset.titulo}.
 """)
 
-# Função para carregar os dados
-@st.cache_data
-def carregar_dados():
-    # Carrega o dataset contendo informações socioeconômicas dos bairros de Natal/RN
-    df = pd.read_csv('https://raw.githubusercontent.com/igendriz/DCA3501-Ciencia-Dados/main/Dataset/Bairros_Natal_v01.csv')
-    
-    # Remove linhas com quaisquer valores ausentes (NaN)
-    df = df.dropna()
-    
-    # Corrige nomes específicos de bairros para padronização (sem acentos ou espaços)
-    df.loc[0, "bairro"] = 'ns_apresentacao'   # Nossa Senhora da Apresentação
-    df.loc[34, "bairro"] = 'ns_nazare'        # Nossa Senhora de Nazaré
-    df.loc[32, "bairro"] = 'c_esperanca'      # Cidade da Esperança
-    
-    # Remove a coluna 'Unnamed: 0', gerada automaticamente pelo salvamento anterior do CSV
-    if 'Unnamed: 0' in df.columns:
-        df = df.drop(columns='Unnamed: 0')
-    
-    return df
-
-# Carrega os dados
-df_natal = carregar_dados()
-
-# Sidebar para filtros
-st.sidebar.header("Filtros")
+# Os dados são lidos pelo armazém compartilhado do processo (o mesmo para
+# todas as páginas do app multipágina), e só os da seleção da sidebar. Limites
+# dos filtros, extensão do mapa e estatísticas por região vêm do cubo de
+# agregados da cidade, lido dos metadados das partições
+armazem = obter_armazem()
+with perfil.etapa('carregar_cubo'):
+    cubo_cidade = cubo_dataset(cidade)
+    resumo_cidade = combinar_regioes(cubo_cidade)
 
-# Filtro por região
-regioes = ["Todas"] + sorted(df_natal["regiao"].unique().tolist())
+# Filtro por região (lista vinda do registro, sem percorrer os dados)
+regioes = ["Todas"] + dataset.regioes
 regiao_selecionada = st.sidebar.selectbox("Selecione a Região:", regioes)
 
 # Filtro por indicador socioeconômico
@@ -75,19 +96,162 @@ coluna_indicador = indicadores[indicador_selecionado]
 
 # Filtro por limiar de rendimento
 if coluna_indicador in ["renda_mensal_pessoa", "rendimento_nominal_medio"]:
-    min_valor = float(df_natal[coluna_indicador].min())
-    max_valor = float(df_natal[coluna_indicador].max())
+    min_valor = float(resumo_cidade[(coluna_indicador, "min")])
+    max_valor = float(resumo_cidade[(coluna_indicador, "max")])
     limiar = st.sidebar.slider(
         "Limiar de Rendimento:",
         min_valor, max_valor,
         (min_valor + max_valor) / 2  # valor padrão
     )
 
-# Aplicar filtros
-if regiao_selecionada != "Todas":
-    df_filtrado = df_natal[df_natal["regiao"] == regiao_selecionada.lower()]
+# Tamanho do ranking de bairros: acima de 2 * N bairros, o gráfico mostra
+# apenas os N maiores e os N menores e agrega os demais
+n_ranking = st.sidebar.number_input(
+    "Bairros no ranking (maiores e menores):",
+    min_value=5, max_value=200, value=BARRAS_TOP_N, step=5
+)
+
+# Área visível do mapa, em km: o gráfico espacial recebe apenas os pontos
+# dentro dela, consultados no índice espacial em vez de filtrar todas as linhas
+def extensao_km(coluna):
+    # Menor e maior coordenada em km, arredondadas para fora em 0,1 km
+    minimo, maximo = float(resumo_cidade[(coluna, "min")]), float(resumo_cidade[(coluna, "max")])
+    return np.floor(minimo / 100) / 10, np.ceil(maximo / 100) / 10
+
+
+extensao_x = extensao_km("x")
+extensao_y = extensao_km("y")
+with st.sidebar.expander("Área do mapa (km)"):
+    faixa_x = st.slider("Coordenada X:", *extensao_x, extensao_x, step=0.1)
+    faixa_y = st.slider("Coordenada Y:", *extensao_y, extensao_y, step=0.1)
+if (faixa_x, faixa_y) == (extensao_x, extensao_y):
+    area = None
 else:
-    df_filtrado = df_natal.copy()
+    area = (*faixa_x, *faixa_y)
+
+# Mapa de calor: tamanho (km) e forma das células da agregação espacial
+tamanho_celula = st.sidebar.select_slider(
+    "Célula do mapa de calor (km):",
+    options=[0.25, 0.5, 1.0, 2.0, 5.0],
+    value=1.0
+)
+forma_celula = st.sidebar.radio("Forma da célula:", ["Quadrada", "Hexagonal"], horizontal=True)
+celula = (tamanho_celula, forma_celula.lower())
+
+
+# Cache de figuras único do processo; criado aqui, na thread do script, e
+# usado também pelas tarefas de pré-carregamento
+figuras = cache_figuras()
+
+
+def fonte_selecao(regiao):
+    """Fonte dos dados de uma região: só a sua partição, ou a cidade inteira em "Todas"."""
+    return fonte_dataset(cidade, [regiao.lower()]) if regiao != "Todas" else fonte_cidade
+
+
+def preparar_selecao(regiao, coluna, nome_indicador, top_n, area=None,
+                     celula=(1.0, 'quadrada'), perfil=PERFIL_DESLIGADO):
+    """
+    Dados filtrados e figuras de uma seleção (região, indicador).
+
+    Com `area` = (x_min, x_max, y_min, y_max), em km, o gráfico espacial e o
+    mapa de calor mostram apenas os pontos dentro dela. `celula` é o par
+    (tamanho em km, forma) das células do mapa de calor.
+
+    Tudo passa pelos caches compartilhados do processo, então a mesma função
+    serve para a renderização e para o pré-carregamento em segundo plano.
+    """
+    # Com uma região selecionada, só a partição dela é lida
+    with perfil.etapa('filtrar'):
+        fonte = fonte_selecao(regiao)
+        df = armazem.dados(fonte)
+
+    # As figuras ficam no cache do processo, indexadas pela fonte e pelo
+    # estado dos filtros: se apenas um widget não relacionado mudar, elas não
+    # são reconstruídas
+    estado = dict(fonte=fonte, indicador=coluna, regiao=regiao)
+
+    def recortar_area():
+        if area is None:
+            return df
+        x_min, x_max, y_min, y_max = area
+        return df.iloc[indice_espacial(fonte).retangulo(
+            x_min * 1e3, x_max * 1e3, y_min * 1e3, y_max * 1e3
+        )]
+
+    def construir_grade():
+        df_area = recortar_area()
+        tamanho, forma = celula
+        if coluna == "populacao":
+            # População: total de moradores por célula
+            celulas = agregar_em_grade(
+                df_area["x"], df_area["y"], df_area[coluna],
+                tamanho=tamanho * 1e3, forma=forma, estatistica='soma'
+            )
+        else:
+            # Renda: média ponderada pela população dos bairros da célula
+            celulas = agregar_em_grade(
+                df_area["x"], df_area["y"], df_area[coluna], pesos=df_area["populacao"],
+                tamanho=tamanho * 1e3, forma=forma
+            )
+        return figura_grade(celulas, nome_indicador, tamanho * 1e3, forma)
+
+    # Um único traço WebGL, com decimação por grade acima de LIMITE_PONTOS
+    # e rótulos apenas nos bairros com maiores valores do indicador
+    with perfil.etapa('figura_espacial'):
+        fig_espacial = figuras.obter(
+            chave_figura('espacial', area=area, **estado),
+            lambda: figura_espacial(recortar_area(), coluna, nome_indicador)
+        )
+    with perfil.etapa('figura_grade'):
+        fig_grade = figuras.obter(
+            chave_figura('grade', area=area, celula=celula, **estado), construir_grade
+        )
+    with perfil.etapa('figura_barras'):
+        fig_barras = figuras.obter(
+            chave_figura('barras', top_n=top_n, **estado),
+            lambda: figura_barras(df, coluna, nome_indicador, top_n=top_n)
+        )
+    return df, fig_espacial, fig_grade, fig_barras
+
+
+def preparar_estatisticas(coluna, nome_indicador, perfil=PERFIL_DESLIGADO):
+    """Tabela de estatísticas por região e gráfico de comparação de um indicador."""
+    with perfil.etapa('agregar'):
+        # Estatísticas lidas do cubo de agregados da cidade, sem carregar os dados
+        stats = estatisticas_por_regiao(cubo_dataset(cidade), coluna)
+        stats = stats[['regiao', 'mean', 'min', 'max', 'count']]
+        stats.columns = ['Região', 'Média', 'Mínimo', 'Máximo', 'Quantidade de Bairros']
+
+        # Formatar valores numéricos
+        if coluna != "populacao":
+            stats['Média'] = stats['Média'].round(2)
+            stats['Mínimo'] = stats['Mínimo'].round(2)
+            stats['Máximo'] = stats['Máximo'].round(2)
+        else:
+            stats['Média'] = stats['Média'].round(0).astype(int)
+            stats['Mínimo'] = stats['Mínimo'].round(0).astype(int)
+            stats['Máximo'] = stats['Máximo'].round(0).astype(int)
+
+    with perfil.etapa('figura_comparacao'):
+        fig = figuras.obter(
+            chave_figura('comparacao', fonte=fonte_cidade, indicador=coluna),
+            lambda: figura_comparacao(stats, nome_indicador)
+        )
+    return stats, fig
+
+
+df_filtrado, fig_espacial, fig_grade, fig_barras = preparar_selecao(
+    regiao_selecionada, coluna_indicador, indicador_selecionado, n_ranking, area, celula, perfil
+)
+stats_regiao, fig_comparacao = preparar_estatisticas(coluna_indicador, indicador_selecionado, perfil)
+fonte_atual = fonte_selecao(regiao_selecionada)
+
+# Memória ocupada pelos dados carregados da seleção, por coluna (esquema compacto)
+with st.sidebar.expander("Memória dos dados carregados"):
+    memoria = memoria_por_coluna(df_filtrado)
+    st.dataframe(memoria, use_container_width=True)
+    st.caption(f"Total: {memoria['bytes'].sum() / 1024:.1f} KiB")
 
 # Layout principal com duas colunas
 col1, col2 = st.columns([3, 2])
@@ -95,92 +259,65 @@ col1, col2 = st.columns([3, 2])
 with col1:
     st.subheader("Visualização Espacial dos Bairros")
     
-    # Preparação dos dados para visualização espacial
-    x = df_filtrado['x'] / 1e3   # Coordenada X convertida para quilômetros
-    y = df_filtrado['y'] / 1e3   # Coordenada Y convertida para quilômetros
-    
-    # Dicionário com cores atribuídas para cada região
-    cores_regiao = {
-        'norte': 'blue',
-        'sul': 'green',
-        'leste': 'orange',
-        'oeste': 'red'
-    }
-    
-    # Criar figura Plotly para visualização espacial
-    fig_espacial = go.Figure()
-    
-    # Adicionar pontos para cada região
-    for regiao, grupo in df_filtrado.groupby('regiao'):
-        tamanho = grupo[coluna_indicador]
-        
-        # Ajustar escala de tamanho conforme o indicador
-        if coluna_indicador == "populacao":
-            tamanho = tamanho / 150
-        elif coluna_indicador == "rendimento_nominal_medio":
-            tamanho = tamanho * 50
-        else:  # renda_mensal_pessoa
-            tamanho = tamanho / 20
-        
-        fig_espacial.add_trace(go.Scatter(
-            x=grupo['x'] / 1e3,
-            y=grupo['y'] / 1e3,
-            mode='markers+text',
-            marker=dict(
-                size=tamanho,
-                color=cores_regiao.get(regiao, 'gray'),
-                opacity=0.8,
-                line=dict(width=1, color='black')
-            ),
-            text=grupo['bairro'],
-            textposition="top center",
-            name=regiao.capitalize(),
-            hovertemplate=(
-                "<b>%{text}</b><br>" +
-                f"Região: {regiao.capitalize()}<br>" +
-                f"{indicador_selecionado}: %{{customdata}}<br>" +
-                "Coordenada X: %{x:.2f} km<br>" +
-                "Coordenada Y: %{y:.2f} km"
-            ),
-            customdata=grupo[coluna_indicador]
-        ))
-    
-    # Configurações do layout
-    fig_espacial.update_layout(
-        title=f"Distribuição Espacial por {indicador_selecionado}",
-        xaxis_title="Coordenada X (km)",
-        yaxis_title="Coordenada Y (km)",
-        legend_title="Região",
-        height=600,
-        hovermode='closest'
-    )
-    
-    # Exibir o gráfico
-    st.plotly_chart(fig_espacial, use_container_width=True)
+    # Pontos por bairro e, ao lado, a agregação em células (mapa de calor)
+    aba_pontos, aba_grade = st.tabs(["Bairros", "Mapa de calor"])
+    with aba_pontos, perfil.etapa('plotly_chart:espacial'):
+        st.plotly_chart(fig_espacial, use_container_width=True)
+    with aba_grade, perfil.etapa('plotly_chart:grade'):
+        st.plotly_chart(fig_grade, use_container_width=True)
 
 with col2:
     st.subheader("Análise por Bairro")
     
-    # Gráfico de barras para o indicador selecionado
-    fig_barras = px.bar(
-        df_filtrado.sort_values(by=coluna_indicador, ascending=False),
-        x="bairro",
-        y=coluna_indicador,
-        color="regiao",
-        title=f"{indicador_selecionado} por Bairro",
-        labels={"bairro": "Bairro", coluna_indicador: indicador_selecionado},
-        height=600
+    # Exibir o gráfico
+    with perfil.etapa('plotly_chart:barras'):
+        st.plotly_chart(fig_barras, use_container_width=True)
+
+# Bairros próximos: consulta de raio no índice espacial dos dados da seleção,
+# sem calcular a distância até todos os bairros
+st.subheader("Bairros Próximos")
+col_referencia, col_raio = st.columns([2, 1])
+with col_referencia:
+    # O nome é buscado no índice de trigramas, e só os melhores candidatos vão
+    # para o navegador, em vez da lista de todos os bairros
+    consulta_referencia = st.text_input(
+        "Bairro de referência:", placeholder="Digite parte do nome do bairro"
     )
-    
-    # Ajustar layout
-    fig_barras.update_layout(
-        xaxis_tickangle=-45,
-        xaxis_title="Bairro",
-        yaxis_title=indicador_selecionado
+    candidatos = []
+    if consulta_referencia:
+        posicoes_candidatos = indice_busca(fonte_atual).buscar(
+            consulta_referencia, limite=CANDIDATOS_REFERENCIA
+        )
+        candidatos = df_filtrado["bairro"].iloc[posicoes_candidatos].astype(str).tolist()
+    bairro_referencia = st.selectbox(
+        "Bairros encontrados:", candidatos, disabled=not candidatos
     )
-    
-    # Exibir o gráfico
-    st.plotly_chart(fig_barras, use_container_width=True)
+with col_raio:
+    raio_km = st.slider("Raio (km):", 0.5, 10.0, 2.0, step=0.5)
+
+if bairro_referencia is None:
+    if consulta_referencia:
+        st.warning(f'Nenhum bairro encontrado com "{consulta_referencia}".')
+    else:
+        st.info("Digite o nome de um bairro para ver os bairros próximos.")
+else:
+    with perfil.etapa('proximidade'):
+        # Posição do bairro pelo índice hash de nomes, sem percorrer as linhas
+        posicao = indice_chave("bairro", fonte_atual).posicoes([bairro_referencia])[0]
+        referencia = df_filtrado.iloc[posicao]
+        posicoes, distancias = indice_espacial(fonte_atual).raio(
+            referencia["x"], referencia["y"], raio_km * 1e3
+        )
+        vizinhos = posicoes != posicao
+        proximos = df_filtrado.iloc[posicoes[vizinhos]][["bairro", "regiao", coluna_indicador]].assign(
+            distancia_km=(distancias[vizinhos] / 1e3).round(2)
+        )
+
+    if proximos.empty:
+        st.info(f"Nenhum bairro a até {raio_km} km de {bairro_referencia}.")
+    else:
+        st.write(f"{len(proximos)} bairros a até {raio_km} km de **{bairro_referencia}**:")
+        st.dataframe(proximos, use_container_width=True, hide_index=True)
 
 # Seção adicional para estatísticas
 st.subheader("Estatísticas Descritivas")
@@ -191,37 +328,14 @@ if regiao_selecionada != "Todas":
 else:
     st.write("Estatísticas por região:")
 
-# Calcular estatísticas por região
-stats_regiao = df_natal.groupby('regiao')[coluna_indicador].agg(['mean', 'min', 'max', 'count']).reset_index()
-stats_regiao.columns = ['Região', 'Média', 'Mínimo', 'Máximo', 'Quantidade de Bairros']
-
-# Formatar valores numéricos
-if coluna_indicador != "populacao":
-    stats_regiao['Média'] = stats_regiao['Média'].round(2)
-    stats_regiao['Mínimo'] = stats_regiao['Mínimo'].round(2)
-    stats_regiao['Máximo'] = stats_regiao['Máximo'].round(2)
-else:
-    stats_regiao['Média'] = stats_regiao['Média'].round(0).astype(int)
-    stats_regiao['Mínimo'] = stats_regiao['Mínimo'].round(0).astype(int)
-    stats_regiao['Máximo'] = stats_regiao['Máximo'].round(0).astype(int)
-
 # Exibir tabela de estatísticas
 st.dataframe(stats_regiao, use_container_width=True)
 
 # Adicionar um gráfico de comparação entre regiões
 st.subheader("Comparação entre Regiões")
 
-fig_comparacao = px.bar(
-    stats_regiao,
-    x='Região',
-    y='Média',
-    color='Região',
-    title=f"Média de {indicador_selecionado} por Região",
-    labels={"Média": f"Média de {indicador_selecionado}"},
-    text_auto=True
-)
-
-st.plotly_chart(fig_comparacao, use_container_width=True)
+with perfil.etapa('plotly_chart:comparacao'):
+    st.plotly_chart(fig_comparacao, use_container_width=True)
 
 # Rodapé com informações
 st.markdown("---")
@@ -230,3 +344,54 @@ st.markdown("""
 **Aplicação desenvolvida com:** Streamlit e Plotly  
 **Contexto:** Aula de Ciência de Dados - Visualização Interativa
 """)
+
+# Pré-carregamento: com a página já renderizada, as seleções vizinhas (outras
+# regiões com o mesmo indicador, outros indicadores na mesma região) são
+# calculadas em segundo plano e guardadas nos caches, para que o próximo
+# clique seja servido da memória. A cidade inteira ("Todas") só é lida quando
+# selecionada
+prefetch = obter_prefetch()
+if prefetch is not None:
+    tarefas = {}
+    for regiao in dataset.regioes:
+        if regiao != regiao_selecionada:
+            tarefas[(cidade, regiao, coluna_indicador, n_ranking, area, celula)] = partial(
+                preparar_selecao, regiao, coluna_indicador, indicador_selecionado, n_ranking, area, celula
+            )
+    for nome, coluna in indicadores.items():
+        if coluna != coluna_indicador:
+            tarefas[(cidade, regiao_selecionada, coluna, n_ranking, area, celula)] = partial(
+                preparar_selecao, regiao_selecionada, coluna, nome, n_ranking, area, celula
+            )
+            tarefas[(cidade, 'estatisticas', coluna)] = partial(preparar_estatisticas, coluna, nome)
+    # Cada sessão só cancela a sua própria rodada anterior
+    prefetch.agendar(tarefas, sessao=id_sessao(st.session_state))
+
+# Painel do modo de perfil, com o detalhamento desta execução; a mesma
+# informação vai para o log como uma linha JSON
+if perfil.ativo:
+    with st.sidebar.expander("Perfil da execução", expanded=True):
+        tabela_perfil = perfil.tabela()
+        st.dataframe(tabela_perfil, use_container_width=True, hide_index=True)
+        st.caption(
+            f"Etapas: {tabela_perfil['ms'].sum():.1f} ms · "
+            f"execução completa: {perfil.total_ms():.1f} ms"
+        )
+        # Contadores do cache de figuras (acumulados no processo)
+        estatisticas_figuras = figuras.estatisticas()
+        st.caption(
+            f"Cache de figuras: {estatisticas_figuras['acertos']} acertos, "
+            f"{estatisticas_figuras['falhas']} falhas, "
+            f"{estatisticas_figuras['remocoes']} remoções · "
+            f"{estatisticas_figuras['entradas']} entradas, "
+            f"{estatisticas_figuras['bytes'] / 1024:.0f} de "
+            f"{estatisticas_figuras['limite_bytes'] / 1024:.0f} KiB"
+        )
+    perfil.registrar(
+        script='streamlit_app.py',
+        cache_figuras=figuras.estatisticas(),
+        cidade=cidade,
+        regiao=regiao_selecionada,
+        indicador=coluna_indicador,
+        top_n=int(n_ranking),
+    )
@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from natal_dados.graficos import dados_ranking
+
+
+def test_outros_ignora_bairros_sem_valor():
+    df = pd.DataFrame({
+        'bairro': list('abcdefghij'),
+        'regiao': 'sul',
+        'v': [10, 9, 1, 2, 3, 4, 8, np.nan, np.nan, 8.0],
+    })
+    outros = dados_ranking(df, 'v', 2).iloc[2]
+    # Média de 3, 4 e 8 (e 8 do empate), sem contar os dois nulos
+    assert outros['v'] == pytest.approx(np.mean([3, 4, 8, 8]))
+    assert outros['bairro'].startswith('Outros (4 bairros')
+
+
+def test_empates_no_corte_nao_repetem_bairros():
+    df = pd.DataFrame({'bairro': list('abcde'), 'regiao': 'sul', 'v': [1.0] * 5})
+    bairros = dados_ranking(df, 'v', 2)['bairro']
+    extremos = bairros[~bairros.str.startswith('Outros')]
+    assert extremos.is_unique
+    assert len(extremos) == 4
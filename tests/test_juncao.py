@@ -0,0 +1,46 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from natal_dados.juncao import IndiceChave, JuncaoIncremental
+from natal_dados.upload import ler_csv_em_blocos
+
+BAIRROS = ['Lagoa Nova', 'Ponta Negra', 'Tirol', 'Petrópolis', 'Candelária']
+
+
+def juntar(texto, linhas_por_bloco):
+    juncao = JuncaoIncremental(IndiceChave(BAIRROS), 'bairro', ['bairro'])
+    for bloco, _ in ler_csv_em_blocos(io.StringIO(texto), tamanho_bloco=linhas_por_bloco):
+        juncao.atualizar(bloco)
+    return juncao
+
+
+@pytest.fixture
+def csv_com_repeticoes():
+    # Chaves repetidas dentro de um mesmo bloco e entre blocos diferentes
+    nomes = ['Tirol', 'Tirol', 'Lagoa Nova', 'tirol', 'Ponta Negra', 'Lagoa Nova',
+             'Petropolis', 'TIROL', 'Ponta Negra', 'Ponta Negra', 'Centro', 'Tirol']
+    return pd.DataFrame({'bairro': nomes, 'valor': range(len(nomes))}).to_csv(index=False)
+
+
+def test_repetidas_nao_depende_do_tamanho_do_bloco(csv_com_repeticoes):
+    resumos = {n: juntar(csv_com_repeticoes, n).resumo() for n in (1, 2, 3, 5, 100)}
+    # 11 linhas casadas em 4 bairros distintos: 7 repetições
+    assert {n: r['repetidas'] for n, r in resumos.items()} == dict.fromkeys(resumos, 7)
+    assert {r['bairros_preenchidos'] for r in resumos.values()} == {4}
+
+
+def test_vale_a_ultima_ocorrencia(csv_com_repeticoes):
+    juntadas = juntar(csv_com_repeticoes, 2).colunas_juntadas()
+    assert juntadas['valor'].tolist()[:4] == [5.0, 9.0, 11.0, 6.0]
+    assert np.isnan(juntadas['valor'].iloc[4])
+
+
+def test_nomes_originais_das_correcoes_encontram_o_nome_corrigido():
+    correcoes = {'nossa senhora de nazare': 'ns_nazare', 'cidade da esperanca': 'c_esperanca'}
+    indice = IndiceChave(['ns_nazare', 'Tirol', 'c_esperanca'], correcoes)
+    posicoes = indice.posicoes(['Nossa Senhora de Nazaré', 'Cidade da Esperança', 'ns nazare', 'Alecrim'])
+    assert posicoes.tolist() == [0, 2, 0, -1]
+    assert indice.duplicadas == 0
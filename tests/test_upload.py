@@ -0,0 +1,31 @@
+import io
+
+import pytest
+
+from natal_dados.upload import ErroEsquema, ler_csv_em_blocos
+
+
+def ler(texto, tamanho_bloco):
+    return list(ler_csv_em_blocos(io.StringIO(texto), tamanho_bloco=tamanho_bloco))
+
+
+def test_inteiros_com_decimais_em_bloco_posterior_viram_float():
+    texto = 'bairro,valor\nTirol,1\nCentro,2\nAlecrim,\nRibeira,2.5\n'
+    blocos = ler(texto, 2)
+    assert str(blocos[0][0]['valor'].dtype) == 'Int64'
+    assert str(blocos[-1][0]['valor'].dtype) == 'float64'
+    resumo = blocos[-1][1].tabela().loc['valor']
+    assert resumo['contagem'] == 3
+    assert resumo['máximo'] == pytest.approx(2.5)
+
+
+def test_bloco_so_com_nulos_mantem_inteiros():
+    texto = 'bairro,valor\nTirol,1\nCentro,2\nAlecrim,\nRibeira,\n'
+    assert [str(bloco['valor'].dtype) for bloco, _ in ler(texto, 2)] == ['Int64', 'Int64']
+
+
+def test_texto_em_coluna_numerica_vira_erro_de_esquema():
+    # `populacao` tem tipo fixo em ESQUEMA_BAIRROS
+    texto = 'bairro,populacao\nTirol,100\nCentro,abc\n'
+    with pytest.raises(ErroEsquema, match='linha 2'):
+        ler(texto, 1)